@@ -0,0 +1,139 @@
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+DEFAULT_SAMPLE_RATES = {
+    "task_status": 0.1,
+    "heartbeat": 0.01,
+    "task_progress": 0.01,
+}
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        message_type, rate = item.split("=", 1)
+        try:
+            rates[message_type.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+class A2AEventLogger:
+    def __init__(self, stream=None, preview_chars: int = 256, ring_size: int = 1000,
+                 sample_rates: Dict[str, float] = None, default_sample_rate: float = 1.0):
+        self.stream = stream or sys.stdout
+        self.preview_chars = preview_chars
+        self.sample_rates = dict(DEFAULT_SAMPLE_RATES)
+        self.sample_rates.update(sample_rates or {})
+        self.default_sample_rate = default_sample_rate
+        self.events = deque(maxlen=ring_size)
+        self.emitted = 0
+        self.sampled_out = 0
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            preview_chars=int(os.getenv("A2A_LOG_PREVIEW_CHARS", "256")),
+            ring_size=int(os.getenv("A2A_LOG_RING_SIZE", "1000")),
+            sample_rates=parse_sample_rates(os.getenv("A2A_LOG_SAMPLE_RATES", "")),
+            default_sample_rate=float(os.getenv("A2A_LOG_DEFAULT_SAMPLE_RATE", "1.0"))
+        )
+
+    def start(self):
+        if self._writer and self._writer.is_alive():
+            return
+        self._writer = threading.Thread(target=self._write_loop, name="a2a-event-log", daemon=True)
+        self._writer.start()
+
+    def stop(self):
+        if self._writer and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=2.0)
+        self._writer = None
+
+    def preview(self, payload: Any) -> Optional[str]:
+        if payload is None:
+            return None
+        text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        if len(text) <= self.preview_chars:
+            return text
+        return f"{text[:self.preview_chars]}... ({len(text)} chars)"
+
+    def should_sample(self, message_type: str = None) -> bool:
+        rate = self.sample_rates.get(message_type, self.default_sample_rate)
+        if rate >= 1.0:
+            return True
+        return rate > 0.0 and random.random() < rate
+
+    def log(self, event: str, message_type: str = None, payload: Any = None,
+            level: str = "info", **fields) -> bool:
+        if level == "info" and not self.should_sample(message_type):
+            self.sampled_out += 1
+            return False
+        record = {"ts": time.time(), "event": event, "level": level}
+        if message_type is not None:
+            record["message_type"] = message_type
+        if payload is not None:
+            record["payload"] = self.preview(payload)
+        record.update(fields)
+        self.events.append(record)
+        self.emitted += 1
+        if self._writer:
+            self._queue.put(record)
+        return True
+
+    def recent(self, limit: int = 100, event: str = None, message_type: str = None) -> List[Dict[str, Any]]:
+        matches = []
+        for record in reversed(self.events):
+            if event and record.get("event") != event:
+                continue
+            if message_type and record.get("message_type") != message_type:
+                continue
+            matches.append(record)
+            if len(matches) >= limit:
+                break
+        matches.reverse()
+        return matches
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "emitted": self.emitted,
+            "sampled_out": self.sampled_out,
+            "buffered": len(self.events),
+            "ring_size": self.events.maxlen,
+            "sample_rates": self.sample_rates
+        }
+
+    def _write_loop(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            lines = [json.dumps(record, default=str)]
+            while len(lines) < 256:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._flush(lines)
+                    return
+                lines.append(json.dumps(record, default=str))
+            self._flush(lines)
+
+    def _flush(self, lines: List[str]):
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            pass
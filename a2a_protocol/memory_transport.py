@@ -0,0 +1,96 @@
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+from websockets.frames import Close
+
+_CLOSED = object()
+
+class MemoryWebSocket:
+    def __init__(self, name: str):
+        self.remote_address = ("memory", name)
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.peer: Optional["MemoryWebSocket"] = None
+        self.close_code: Optional[int] = None
+        self.close_reason = ""
+        self.closed_event = asyncio.Event()
+
+    async def send(self, message):
+        if self.close_code is not None:
+            raise self._closed_error()
+        self.peer.incoming.put_nowait(message)
+
+    async def recv(self):
+        if self.close_code is not None and self.incoming.empty():
+            raise self._closed_error()
+        message = await self.incoming.get()
+        if message is _CLOSED:
+            self.incoming.put_nowait(_CLOSED)
+            raise self._closed_error()
+        return message
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.recv()
+        except ConnectionClosedOK:
+            raise StopAsyncIteration
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        if self.close_code is not None:
+            return
+        self._mark_closed(code, reason)
+        self.peer._mark_closed(code, reason)
+
+    async def wait_closed(self):
+        await self.closed_event.wait()
+
+    def _mark_closed(self, code: int, reason: str):
+        if self.close_code is not None:
+            return
+        self.close_code = code
+        self.close_reason = reason
+        self.incoming.put_nowait(_CLOSED)
+        self.closed_event.set()
+
+    def _closed_error(self):
+        frame = Close(self.close_code, self.close_reason)
+        if self.close_code in (1000, 1001):
+            return ConnectionClosedOK(frame, frame, True)
+        return ConnectionClosedError(frame, frame, True)
+
+class MemoryHub:
+    def __init__(self):
+        self.handlers: Dict[str, Callable[[Any], Awaitable[None]]] = {}
+        self.sessions = set()
+        self.ids = itertools.count(1)
+
+    def serve(self, url: str, handler: Callable[[Any], Awaitable[None]]):
+        self.handlers[url] = handler
+
+    async def connect(self, url: str, **_options) -> MemoryWebSocket:
+        handler = self.handlers.get(url)
+        if handler is None:
+            raise ConnectionRefusedError(f"No in-memory server at {url}")
+        session = next(self.ids)
+        client = MemoryWebSocket(f"{url}#client-{session}")
+        server = MemoryWebSocket(f"client-{session}")
+        client.peer, server.peer = server, client
+        task = asyncio.create_task(self._serve(handler, server))
+        self.sessions.add(task)
+        task.add_done_callback(self.sessions.discard)
+        return client
+
+    async def _serve(self, handler, websocket: MemoryWebSocket):
+        try:
+            await handler(websocket)
+        finally:
+            await websocket.close(1001, "handler finished")
+
+    async def close(self):
+        for task in list(self.sessions):
+            task.cancel()
+        await asyncio.gather(*self.sessions, return_exceptions=True)
@@ -1,12 +1,25 @@
 #!/usr/bin/env python3
 import asyncio
 import json
+import os
+import sys
+import time
 import websockets
-from typing import Dict, List, Any
-from dataclasses import dataclass
+from typing import Dict, List, Any, Set
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from datetime import datetime
 import uuid
 
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a_protocol.event_log import A2AEventLogger
+from a2a_protocol.scheduler import PriorityScheduler, parse_priority, priority_name
+from a2a_protocol.timer_wheel import TimerWheel
+from a2a_protocol.tracing import Tracer, current_context, extract, inject
+
 @dataclass
 class A2AAgent:
     agent_id: str
@@ -28,12 +41,48 @@ class A2ATask:
     created_at: datetime
     completed_at: datetime = None
     result: Dict[str, Any] = None
+    capability: str = None
+    error: str = None
+    attempts: int = 1
+    batch_id: str = None
+    coalesce_key: str = None
+    deadline: float = None
+    priority: int = 1
+    enqueued_at: float = None
+    subscribers: List[Dict[str, Any]] = field(default_factory=list)
+    stream_to: List[Any] = field(default_factory=list)
+    progress_sequence: int = 0
+    trace: Dict[str, str] = None
+
+@dataclass
+class A2ABatch:
+    batch_id: str
+    from_agent: str
+    task_ids: List[str]
+    size: int
+    status: str
+    created_at: datetime
+    reply_to: Any = None
+    completed_at: datetime = None
 
 class A2AServer:
-    def __init__(self):
+    def __init__(self, lease_ttl: float = None, max_task_attempts: int = 3):
         self.agents: Dict[str, A2AAgent] = {}
         self.tasks: Dict[str, A2ATask] = {}
+        self.batches: Dict[str, A2ABatch] = {}
+        self.inflight: Dict[str, str] = {}
         self.connections: Dict[str, websockets.WebSocketServerProtocol] = {}
+        self.websocket_agents: Dict[Any, str] = {}
+        self.agent_tasks: Dict[str, Set[str]] = {}
+        self.queues: Dict[str, PriorityScheduler] = {}
+        self.priority_aging = float(os.getenv("A2A_PRIORITY_AGING", "5"))
+        self.default_agent_concurrency = int(os.getenv("A2A_DEFAULT_AGENT_CONCURRENCY", "1"))
+        self.event_log = A2AEventLogger.from_env()
+        self.lease_ttl = lease_ttl or float(os.getenv("A2A_LEASE_TTL", "6"))
+        self.heartbeat_interval = self.lease_ttl / 3
+        self.max_task_attempts = max_task_attempts
+        self.timers = TimerWheel(tick=0.25)
+        self.tracer = Tracer.from_env("a2a_server")
     
     async def register_agent(self, agent_data: Dict[str, Any], websocket) -> Dict[str, Any]:
         agent_id = agent_data.get("agent_id", str(uuid.uuid4()))
@@ -48,13 +97,164 @@ class A2AServer:
         )
         self.agents[agent_id] = agent
         self.connections[agent_id] = websocket
-        print(f"Agent registered: {agent.name} ({agent_id})")
+        self.websocket_agents[websocket] = agent_id
+        self.renew_lease(agent_id)
+        self.event_log.log("agent_registered", agent_id=agent_id, name=agent.name,
+                           capabilities=agent.capabilities)
+        await self._dispatch(agent_id)
         return {
             "status": "success",
             "agent_id": agent_id,
-            "message": f"Agent {agent.name} registered successfully"
+            "message": f"Agent {agent.name} registered successfully",
+            "lease_ttl": self.lease_ttl,
+            "heartbeat_interval": self.heartbeat_interval
         }
     
+    def renew_lease(self, agent_id: str) -> bool:
+        agent = self.agents.get(agent_id)
+        if not agent or agent_id not in self.connections:
+            return False
+        agent.last_seen = datetime.now()
+        self.timers.schedule(("lease", agent_id), time.monotonic() + self.lease_ttl)
+        if agent.status == "unresponsive":
+            agent.status = "available"
+            self.event_log.log("agent_revived", agent_id=agent_id)
+        return True
+    
+    async def heartbeat(self, data: Dict[str, Any], websocket) -> Dict[str, Any]:
+        agent_id = self.websocket_agents.get(websocket) or data.get("agent_id")
+        if not self.renew_lease(agent_id):
+            return {
+                "type": "heartbeat_ack",
+                "status": "error",
+                "message": f"Agent {agent_id} is not registered on this connection"
+            }
+        return {
+            "type": "heartbeat_ack",
+            "status": "success",
+            "lease_ttl": self.lease_ttl
+        }
+    
+    async def run_timers(self):
+        while True:
+            await asyncio.sleep(self.timers.tick)
+            for kind, key in self.timers.advance():
+                try:
+                    if kind == "lease":
+                        await self.expire_agent(key)
+                    elif kind == "deadline":
+                        await self.expire_task(key)
+                except Exception as e:
+                    self.event_log.log("timer_callback_failed", level="error", kind=kind, key=key, error=str(e))
+    
+    async def expire_agent(self, agent_id: str):
+        agent = self.agents.get(agent_id)
+        if not agent or agent.status != "available":
+            return
+        agent.status = "unresponsive"
+        self.event_log.log("agent_lease_expired", level="warning", agent_id=agent_id,
+                           last_seen=agent.last_seen.isoformat())
+        await self._release_agent_tasks(agent_id, "lease expired")
+    
+    def _select_agent(self, capability: str, exclude: Set[str] = ()) -> str:
+        candidates = [
+            agent.agent_id for agent in self.agents.values()
+            if agent.status == "available"
+            and capability in agent.capabilities
+            and agent.agent_id in self.connections
+            and agent.agent_id not in exclude
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=self._agent_load)
+    
+    def _agent_load(self, agent_id: str) -> int:
+        return len(self.agent_tasks.get(agent_id, ())) + len(self.queues.get(agent_id, ()))
+    
+    def _agent_capacity(self, agent_id: str) -> int:
+        agent = self.agents.get(agent_id)
+        if not agent:
+            return 0
+        return max(1, int(agent.metadata.get("max_concurrent_tasks", self.default_agent_concurrency)))
+    
+    def _enqueue(self, task: A2ATask):
+        task.status = "pending"
+        if task.enqueued_at is None:
+            task.enqueued_at = time.monotonic()
+        queue = self.queues.setdefault(task.to_agent, PriorityScheduler(self.priority_aging))
+        queue.push(task, task.priority, task.enqueued_at)
+    
+    async def _dispatch(self, agent_id: str):
+        queue = self.queues.get(agent_id)
+        if not queue or agent_id not in self.connections:
+            return
+        if self.agents[agent_id].status != "available":
+            return
+        while len(self.agent_tasks.get(agent_id, ())) < self._agent_capacity(agent_id):
+            task = queue.pop()
+            if task is None:
+                break
+            if task.status != "pending" or task.to_agent != agent_id:
+                continue
+            try:
+                await self._send_assignment(task)
+            except Exception as e:
+                task.error = f"Failed to send task: {str(e)}"
+                self._finalize_task(task, "failed")
+                await self._notify_task_finished(task)
+    
+    async def _send_assignment(self, task: A2ATask):
+        task_message = {
+            "type": "task_assignment",
+            "task_id": task.task_id,
+            "from_agent": task.from_agent,
+            "task_type": task.task_type,
+            "payload": task.payload,
+            "deadline": task.deadline,
+            "stream": bool(task.stream_to)
+        }
+        if task.trace:
+            if task.enqueued_at is not None:
+                now = time.time()
+                self.tracer.record("a2a.queued", now - (time.monotonic() - task.enqueued_at), now,
+                                   parent=task.trace, task_id=task.task_id, to_agent=task.to_agent)
+            inject(task_message, task.trace)
+        task.status = "in_progress"
+        self.agent_tasks.setdefault(task.to_agent, set()).add(task.task_id)
+        await self.connections[task.to_agent].send(json.dumps(task_message))
+    
+    async def _release_agent_tasks(self, agent_id: str, reason: str):
+        released = [self.tasks.get(task_id) for task_id in self.agent_tasks.pop(agent_id, ())]
+        queue = self.queues.pop(agent_id, None)
+        if queue:
+            released.extend(queue.drain())
+        
+        rerouted_to = set()
+        for task in released:
+            if not task or task.to_agent != agent_id or task.status not in ("pending", "in_progress"):
+                continue
+            if task.status == "in_progress":
+                await self._send_cancellation(task, f"agent {reason}")
+            
+            alternative = None
+            if task.capability and task.attempts < self.max_task_attempts:
+                alternative = self._select_agent(task.capability, exclude={agent_id})
+            
+            if alternative:
+                if task.status == "in_progress":
+                    task.attempts += 1
+                task.to_agent = alternative
+                self._enqueue(task)
+                rerouted_to.add(alternative)
+                self.event_log.log("task_rerouted", task_id=task.task_id, from_agent=agent_id,
+                                   to_agent=alternative, reason=reason)
+                continue
+            
+            await self.fail_task(task.task_id, f"Agent {agent_id} {reason}")
+        
+        for alternative in rerouted_to:
+            await self._dispatch(alternative)
+    
     async def discover_agents(self, capability_filter: str = None) -> Dict[str, Any]:
         available_agents = []
         for agent in self.agents.values():
@@ -73,12 +273,40 @@ class A2AServer:
             "count": len(available_agents)
         }
     
-    async def delegate_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def delegate_task(self, task_data: Dict[str, Any], batch_id: str = None, websocket=None) -> Dict[str, Any]:
         task_id = str(uuid.uuid4())
         from_agent = task_data.get("from_agent")
         to_agent = task_data.get("to_agent")
         task_type = task_data.get("task_type", "general")
         payload = task_data.get("payload", {})
+        capability = task_data.get("capability")
+        priority = parse_priority(task_data.get("priority"), "batch" if batch_id else "normal")
+        deadline = task_data.get("deadline")
+        if deadline is None and task_data.get("timeout"):
+            deadline = time.time() + float(task_data["timeout"])
+        
+        if deadline is not None and deadline <= time.time():
+            return {
+                "status": "error",
+                "message": "Task deadline has already passed"
+            }
+        
+        coalesce_key = None
+        if task_data.get("coalesce", True):
+            coalesce_key = self._coalesce_key(capability or to_agent, task_type, payload)
+            existing = await self._attach_to_inflight(coalesce_key, from_agent, batch_id, deadline, priority)
+            if existing:
+                if task_data.get("stream") and websocket is not None:
+                    existing.stream_to.append(websocket)
+                return {
+                    "status": "success",
+                    "task_id": existing.task_id,
+                    "coalesced": True,
+                    "message": f"Task attached to in-flight task on {existing.to_agent}"
+                }
+        
+        if capability and (to_agent not in self.agents or self.agents[to_agent].status != "available"):
+            to_agent = self._select_agent(capability) or to_agent
         
         if to_agent not in self.agents:
             return {
@@ -99,39 +327,156 @@ class A2AServer:
             task_type=task_type,
             payload=payload,
             status="pending",
-            created_at=datetime.now()
+            created_at=datetime.now(),
+            capability=capability,
+            batch_id=batch_id,
+            coalesce_key=coalesce_key,
+            deadline=deadline,
+            priority=priority
         )
+        if task_data.get("stream") and websocket is not None:
+            task.stream_to.append(websocket)
+        task.trace = current_context() or extract(task_data)
         
         self.tasks[task_id] = task
+        if coalesce_key:
+            self.inflight[coalesce_key] = task_id
+        if deadline is not None:
+            self.timers.schedule(("deadline", task_id), time.monotonic() + deadline - time.time())
         
         if to_agent in self.connections:
-            task_message = {
-                "type": "task_assignment",
-                "task_id": task_id,
-                "from_agent": from_agent,
-                "task_type": task_type,
-                "payload": payload
-            }
-            
-            try:
-                await self.connections[to_agent].send(json.dumps(task_message))
-                task.status = "in_progress"
-                return {
-                    "status": "success",
-                    "task_id": task_id,
-                    "message": f"Task delegated to {to_agent}"
-                }
-            except Exception as e:
+            self._enqueue(task)
+            await self._dispatch(to_agent)
+            if task.status == "failed":
                 return {
                     "status": "error",
-                    "message": f"Failed to send task: {str(e)}"
+                    "message": task.error
                 }
+            return {
+                "status": "success",
+                "task_id": task_id,
+                "priority": priority_name(priority),
+                "queued": task.status == "pending",
+                "message": f"Task delegated to {to_agent}"
+            }
         else:
+            task.error = f"Agent {to_agent} is not connected"
+            self._finalize_task(task, "failed")
             return {
                 "status": "error",
                 "message": f"Agent {to_agent} is not connected"
             }
     
+    def _coalesce_key(self, target: str, task_type: str, payload: Dict[str, Any]) -> str:
+        def normalize(value):
+            if isinstance(value, str):
+                return " ".join(value.lower().split()).rstrip("?.! ")
+            if isinstance(value, dict):
+                return {key: normalize(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [normalize(item) for item in value]
+            return value
+        return json.dumps([target, task_type, normalize(payload)], sort_keys=True, default=str)
+    
+    async def _attach_to_inflight(self, coalesce_key: str, from_agent: str, batch_id: str = None,
+                            deadline: float = None, priority: int = None) -> A2ATask:
+        task = self.tasks.get(self.inflight.get(coalesce_key))
+        if not task or task.status not in ("pending", "in_progress"):
+            self.inflight.pop(coalesce_key, None)
+            return None
+        if task.deadline is not None and (deadline is None or deadline > task.deadline):
+            self._extend_deadline(task, deadline)
+            if task.status == "in_progress":
+                await self._send_deadline_extension(task)
+        if priority is not None and priority < task.priority:
+            if task.status == "pending":
+                self.queues[task.to_agent].promote(task, task.priority, priority)
+            task.priority = priority
+        task.subscribers.append({"from_agent": from_agent, "batch_id": batch_id})
+        self.event_log.log("task_coalesced", task_id=task.task_id, from_agent=from_agent,
+                           subscribers=len(task.subscribers) + 1)
+        return task
+    
+    def _extend_deadline(self, task: A2ATask, deadline: float = None):
+        task.deadline = deadline
+        if deadline is None:
+            self.timers.cancel(("deadline", task.task_id))
+        else:
+            self.timers.schedule(("deadline", task.task_id), time.monotonic() + deadline - time.time())
+    
+    def _finalize_task(self, task: A2ATask, status: str):
+        if task.status == "pending" and task.to_agent in self.queues:
+            self.queues[task.to_agent].remove(task, task.priority)
+        task.status = status
+        task.completed_at = datetime.now()
+        self.timers.cancel(("deadline", task.task_id))
+        self.agent_tasks.get(task.to_agent, set()).discard(task.task_id)
+        if task.coalesce_key and self.inflight.get(task.coalesce_key) == task.task_id:
+            del self.inflight[task.coalesce_key]
+    
+    async def _notify_task_finished(self, task: A2ATask):
+        if task.status == "completed":
+            message = {
+                "type": "task_completed",
+                "task_id": task.task_id,
+                "result": task.result
+            }
+        else:
+            message = {
+                "type": "task_failed",
+                "task_id": task.task_id,
+                "error": task.error
+            }
+        
+        notified = set()
+        registered = set()
+        batches = set()
+        for caller in [{"from_agent": task.from_agent, "batch_id": task.batch_id}] + task.subscribers:
+            if caller.get("batch_id"):
+                if caller["batch_id"] not in batches:
+                    batches.add(caller["batch_id"])
+                    await self._batch_task_finished(task, caller["batch_id"])
+                continue
+            agent_id = caller.get("from_agent")
+            if agent_id in notified or agent_id not in self.connections:
+                continue
+            notified.add(agent_id)
+            websocket = self.connections[agent_id]
+            registered.add(id(websocket))
+            try:
+                await websocket.send(json.dumps(message))
+            except Exception as e:
+                self.event_log.log("task_notify_failed", level="error", task_id=task.task_id, error=str(e))
+        
+        stream_to, task.stream_to = task.stream_to, []
+        for websocket in stream_to:
+            if id(websocket) in registered:
+                continue
+            try:
+                await websocket.send(json.dumps(message))
+            except Exception:
+                pass
+    
+    async def task_progress(self, data: Dict[str, Any], websocket):
+        task = self.tasks.get(data.get("task_id"))
+        if not task or task.status != "in_progress" or self.connections.get(task.to_agent) is not websocket:
+            return
+        if not task.stream_to:
+            return
+        task.progress_sequence += 1
+        message = json.dumps({
+            "type": "task_progress",
+            "task_id": task.task_id,
+            "sequence": task.progress_sequence,
+            "stage": data.get("stage"),
+            "content": data.get("content", "")
+        })
+        for subscriber in list(task.stream_to):
+            try:
+                await subscriber.send(message)
+            except Exception:
+                task.stream_to.remove(subscriber)
+    
     async def complete_task(self, task_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
         if task_id not in self.tasks:
             return {
@@ -140,25 +485,304 @@ class A2AServer:
             }
         
         task = self.tasks[task_id]
-        task.status = "completed"
-        task.completed_at = datetime.now()
+        if task.status in TERMINAL_STATUSES:
+            return {
+                "status": "success",
+                "message": f"Task {task_id} was already {task.status}"
+            }
+        
         task.result = result
+        self._finalize_task(task, "completed")
+        await self._notify_task_finished(task)
+        await self._dispatch(task.to_agent)
         
-        if task.from_agent in self.connections:
-            completion_message = {
-                "type": "task_completed",
+        return {
+            "status": "success",
+            "message": f"Task {task_id} completed successfully"
+        }
+    
+    async def fail_task(self, task_id: str, error: str) -> Dict[str, Any]:
+        if task_id not in self.tasks:
+            return {
+                "status": "error",
+                "message": f"Task {task_id} not found"
+            }
+        
+        task = self.tasks[task_id]
+        if task.status in TERMINAL_STATUSES:
+            return {
+                "status": "success",
+                "message": f"Task {task_id} was already {task.status}"
+            }
+        
+        task.error = error
+        self._finalize_task(task, "failed")
+        self.event_log.log("task_failed", level="warning", task_id=task_id, error=error)
+        await self._notify_task_finished(task)
+        await self._dispatch(task.to_agent)
+        
+        return {
+            "status": "success",
+            "message": f"Task {task_id} marked as failed"
+        }
+    
+    async def delegate_batch(self, batch_data: Dict[str, Any], websocket) -> Dict[str, Any]:
+        from_agent = batch_data.get("from_agent")
+        capability = batch_data.get("capability")
+        to_agent = batch_data.get("to_agent")
+        task_type = batch_data.get("task_type", "general")
+        items = batch_data.get("tasks") or [{"payload": {"query": query}} for query in batch_data.get("queries", [])]
+        
+        if not items:
+            return {
+                "status": "error",
+                "message": "Batch contains no tasks"
+            }
+        
+        if not to_agent and not self._select_agent(capability):
+            return {
+                "status": "error",
+                "message": f"No available agent with capability {capability}"
+            }
+        
+        batch_id = str(uuid.uuid4())
+        batch = A2ABatch(
+            batch_id=batch_id,
+            from_agent=from_agent,
+            task_ids=[],
+            size=len(items),
+            status="dispatching",
+            created_at=datetime.now(),
+            reply_to=websocket
+        )
+        self.batches[batch_id] = batch
+        
+        assignments = {}
+        for item in items:
+            task_data = {
+                "from_agent": from_agent,
+                "to_agent": item.get("to_agent", to_agent),
+                "capability": item.get("capability", capability),
+                "task_type": item.get("task_type", task_type),
+                "payload": item.get("payload", {}),
+                "deadline": item.get("deadline", batch_data.get("deadline")),
+                "priority": item.get("priority", batch_data.get("priority")),
+                "timeout": item.get("timeout", batch_data.get("timeout"))
+            }
+            result = await self.delegate_task(task_data, batch_id=batch_id)
+            if result.get("status") == "success":
+                task_id = result["task_id"]
+                assignments[task_id] = self.tasks[task_id].to_agent
+            else:
+                task_id = self._record_failed_task(task_data, result.get("message"), batch_id)
+            batch.task_ids.append(task_id)
+        
+        self.event_log.log("batch_delegated", batch_id=batch_id, size=len(items),
+                           agents=sorted(set(assignments.values())))
+        batch.status = "in_progress"
+        await self._maybe_finish_batch(batch)
+        
+        return {
+            "type": "batch_accepted",
+            "status": "success",
+            "batch_id": batch_id,
+            "task_ids": batch.task_ids,
+            "assignments": assignments,
+            "rejected": len(batch.task_ids) - len(assignments)
+        }
+    
+    def _record_failed_task(self, task_data: Dict[str, Any], error: str, batch_id: str = None) -> str:
+        task = A2ATask(
+            task_id=str(uuid.uuid4()),
+            from_agent=task_data.get("from_agent"),
+            to_agent=task_data.get("to_agent"),
+            task_type=task_data.get("task_type", "general"),
+            payload=task_data.get("payload", {}),
+            status="failed",
+            created_at=datetime.now(),
+            completed_at=datetime.now(),
+            capability=task_data.get("capability"),
+            error=error,
+            batch_id=batch_id
+        )
+        self.tasks[task.task_id] = task
+        return task.task_id
+    
+    def _batch_results(self, batch: A2ABatch) -> List[Dict[str, Any]]:
+        results = []
+        for task_id in batch.task_ids:
+            task = self.tasks[task_id]
+            results.append({
                 "task_id": task_id,
-                "result": result
+                "agent_id": task.to_agent,
+                "status": task.status,
+                "payload": task.payload,
+                "result": task.result,
+                "error": task.error,
+                "deadline": task.deadline,
+                "priority": priority_name(task.priority)
+            })
+        return results
+    
+    async def _notify_batch(self, batch: A2ABatch, message: Dict[str, Any]):
+        target = self.connections.get(batch.from_agent) or batch.reply_to
+        if not target:
+            return
+        try:
+            await target.send(json.dumps(message))
+        except Exception as e:
+            self.event_log.log("batch_notify_failed", level="error", batch_id=batch.batch_id, error=str(e))
+    
+    async def _batch_task_finished(self, task: A2ATask, batch_id: str):
+        batch = self.batches.get(batch_id)
+        if not batch or batch.status not in ("dispatching", "in_progress"):
+            return
+        finished = sum(1 for task_id in batch.task_ids if self.tasks[task_id].status in TERMINAL_STATUSES)
+        await self._notify_batch(batch, {
+            "type": "batch_progress",
+            "batch_id": batch.batch_id,
+            "task_id": task.task_id,
+            "status": task.status,
+            "result": task.result,
+            "error": task.error,
+            "completed": finished,
+            "total": batch.size
+        })
+        await self._maybe_finish_batch(batch)
+    
+    async def _maybe_finish_batch(self, batch: A2ABatch):
+        if batch.status != "in_progress":
+            return
+        if any(self.tasks[task_id].status not in TERMINAL_STATUSES for task_id in batch.task_ids):
+            return
+        batch.status = "completed"
+        batch.completed_at = datetime.now()
+        results = self._batch_results(batch)
+        succeeded = sum(1 for result in results if result["status"] == "completed")
+        self.event_log.log("batch_completed", batch_id=batch.batch_id, succeeded=succeeded,
+                           failed=len(results) - succeeded)
+        await self._notify_batch(batch, {
+            "type": "batch_completed",
+            "batch_id": batch.batch_id,
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
+        })
+        batch.reply_to = None
+    
+    async def get_batch_status(self, batch_id: str) -> Dict[str, Any]:
+        if batch_id not in self.batches:
+            return {
+                "status": "error",
+                "message": f"Batch {batch_id} not found"
             }
-            
-            try:
-                await self.connections[task.from_agent].send(json.dumps(completion_message))
-            except Exception as e:
-                print(f"Failed to notify task completion: {e}")
         
+        batch = self.batches[batch_id]
+        results = self._batch_results(batch)
         return {
             "status": "success",
-            "message": f"Task {task_id} completed successfully"
+            "batch": {
+                "batch_id": batch_id,
+                "from_agent": batch.from_agent,
+                "status": batch.status,
+                "created_at": batch.created_at.isoformat(),
+                "completed_at": batch.completed_at.isoformat() if batch.completed_at else None,
+                "completed": sum(1 for result in results if result["status"] in TERMINAL_STATUSES),
+                "total": len(results),
+                "results": results
+            }
+        }
+    
+    async def _send_cancellation(self, task: A2ATask, reason: str):
+        if task.to_agent not in self.connections:
+            return
+        cancel_message = {
+            "type": "cancel_task",
+            "task_id": task.task_id,
+            "reason": reason
+        }
+        try:
+            await self.connections[task.to_agent].send(json.dumps(cancel_message))
+        except Exception as e:
+            self.event_log.log("task_cancel_notify_failed", level="error", task_id=task.task_id, error=str(e))
+    
+    async def _send_deadline_extension(self, task: A2ATask):
+        if task.to_agent not in self.connections:
+            return
+        extension_message = {
+            "type": "deadline_extended",
+            "task_id": task.task_id,
+            "deadline": task.deadline
+        }
+        try:
+            await self.connections[task.to_agent].send(json.dumps(extension_message))
+        except Exception as e:
+            self.event_log.log("task_deadline_notify_failed", level="error", task_id=task.task_id, error=str(e))
+    
+    async def expire_task(self, task_id: str):
+        task = self.tasks.get(task_id)
+        if not task or task.status not in ("pending", "in_progress"):
+            return
+        if task.status == "in_progress":
+            await self._send_cancellation(task, "deadline exceeded")
+        await self.fail_task(task_id, "Task deadline exceeded")
+    
+    async def cancel_task(self, data: Dict[str, Any], websocket) -> Dict[str, Any]:
+        task_id = data.get("task_id")
+        if task_id not in self.tasks:
+            return {
+                "status": "error",
+                "message": f"Task {task_id} not found"
+            }
+        
+        task = self.tasks[task_id]
+        if task.status in TERMINAL_STATUSES:
+            return {
+                "status": "success",
+                "message": f"Task {task_id} was already {task.status}"
+            }
+        
+        from_agent = data.get("from_agent") or self.websocket_agents.get(websocket)
+        if task.subscribers:
+            attached = websocket in task.stream_to
+            if attached:
+                task.stream_to.remove(websocket)
+            if task.from_agent == from_agent:
+                primary = task.subscribers.pop(0)
+                task.from_agent = primary["from_agent"]
+                task.batch_id = primary["batch_id"]
+                attached = True
+            else:
+                for index, caller in enumerate(task.subscribers):
+                    if caller["from_agent"] == from_agent:
+                        del task.subscribers[index]
+                        attached = True
+                        break
+            if not attached:
+                return {
+                    "status": "error",
+                    "message": f"Caller is not attached to task {task_id}"
+                }
+            self.event_log.log("task_detached", task_id=task_id, from_agent=from_agent,
+                               remaining=len(task.subscribers) + 1)
+            return {
+                "status": "success",
+                "message": f"Detached from task {task_id}; other callers are still waiting"
+            }
+        
+        reason = data.get("reason", "cancelled by caller")
+        was_running = task.status == "in_progress"
+        task.error = reason
+        self._finalize_task(task, "cancelled")
+        self.event_log.log("task_cancelled", task_id=task_id, from_agent=from_agent, reason=reason)
+        if was_running:
+            await self._send_cancellation(task, reason)
+        if task.batch_id:
+            await self._batch_task_finished(task, task.batch_id)
+        await self._dispatch(task.to_agent)
+        return {
+            "status": "success",
+            "message": f"Task {task_id} cancelled"
         }
     
     async def get_task_status(self, task_id: str) -> Dict[str, Any]:
@@ -179,21 +803,61 @@ class A2AServer:
                 "status": task.status,
                 "created_at": task.created_at.isoformat(),
                 "completed_at": task.completed_at.isoformat() if task.completed_at else None,
-                "result": task.result
+                "result": task.result,
+                "error": task.error,
+                "deadline": task.deadline,
+                "priority": priority_name(task.priority)
             }
         }
     
+    async def get_recent_events(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        events = self.event_log.recent(
+            limit=int(data.get("limit", 100)),
+            event=data.get("event"),
+            message_type=data.get("message_type")
+        )
+        return {
+            "status": "success",
+            "events": events,
+            "count": len(events),
+            "stats": self.event_log.get_stats()
+        }
+    
+    async def agent_disconnected(self, websocket):
+        agent_id = self.websocket_agents.pop(websocket, None)
+        if agent_id and agent_id in self.agents and self.connections.get(agent_id) is websocket:
+            self.agents[agent_id].status = "offline"
+            del self.connections[agent_id]
+            self.timers.cancel(("lease", agent_id))
+            self.event_log.log("agent_offline", agent_id=agent_id)
+            await self._release_agent_tasks(agent_id, "disconnected")
+        return agent_id
+    
     async def handle_message(self, message: str, websocket) -> str:
+        started = time.perf_counter()
         try:
             data = json.loads(message)
         except json.JSONDecodeError:
+            self.event_log.log("a2a_invalid_message", level="error", payload=message)
             return json.dumps({
                 "status": "error",
                 "message": "Invalid JSON format"
             })
         
         message_type = data.get("type")
-        
+        sampled = self.event_log.log("a2a_message", message_type=message_type, payload=message)
+        agent_id = self.websocket_agents.get(websocket)
+        if agent_id:
+            self.renew_lease(agent_id)
+        parent = extract(data)
+        with self.tracer.span(f"a2a.{message_type}", parent=parent) if parent else nullcontext():
+            response = await self._dispatch_message(message_type, data, websocket)
+        if sampled and response is not None:
+            self.event_log.log("a2a_response", message_type=message_type, payload=response,
+                               latency_ms=round((time.perf_counter() - started) * 1000, 3))
+        return response
+    
+    async def _dispatch_message(self, message_type: str, data: Dict[str, Any], websocket) -> str:
         if message_type == "agent_register":
             result = await self.register_agent(data, websocket)
             return json.dumps(result)
@@ -203,17 +867,47 @@ class A2AServer:
             return json.dumps(result)
         
         elif message_type == "delegate_task":
-            result = await self.delegate_task(data)
+            result = await self.delegate_task(data, websocket=websocket)
+            if "request_id" in data:
+                result["request_id"] = data["request_id"]
             return json.dumps(result)
         
+        elif message_type == "delegate_batch":
+            result = await self.delegate_batch(data, websocket)
+            return json.dumps(result)
+        
+        elif message_type == "batch_status":
+            result = await self.get_batch_status(data.get("batch_id"))
+            return json.dumps(result)
+        
+        elif message_type == "task_progress":
+            await self.task_progress(data, websocket)
+            return None
+        
         elif message_type == "task_completed":
             result = await self.complete_task(data.get("task_id"), data.get("result", {}))
             return json.dumps(result)
         
+        elif message_type == "task_failed":
+            result = await self.fail_task(data.get("task_id"), data.get("error", "Task failed"))
+            return json.dumps(result)
+        
+        elif message_type == "cancel_task":
+            result = await self.cancel_task(data, websocket)
+            return json.dumps(result)
+        
+        elif message_type == "heartbeat":
+            result = await self.heartbeat(data, websocket)
+            return json.dumps(result)
+        
         elif message_type == "task_status":
             result = await self.get_task_status(data.get("task_id"))
             return json.dumps(result)
         
+        elif message_type == "recent_events":
+            result = await self.get_recent_events(data)
+            return json.dumps(result)
+        
         else:
             return json.dumps({
                 "status": "error",
@@ -223,37 +917,21 @@ class A2AServer:
 a2a_server = A2AServer()
 
 async def handle_a2a_client(websocket):
-    print(f"A2A client connected: {websocket.remote_address}")
-    client_agent_id = None
+    event_log = a2a_server.event_log
+    event_log.log("client_connected", remote_address=str(websocket.remote_address))
     
     try:
         async for message in websocket:
             try:
-                print(f"A2A message: {message}")
                 response = await a2a_server.handle_message(message, websocket)
-                print(f"A2A response: {response}")
-                await websocket.send(response)
-                
-                data = json.loads(message)
-                if data.get("type") == "agent_register":
-                    client_agent_id = data.get("agent_id")
-                    print(f"Registered agent: {client_agent_id}")
+                if response is not None:
+                    await websocket.send(response)
                     
-            except json.JSONDecodeError as e:
-                print(f"JSON decode error: {e}")
-                error_response = json.dumps({
-                    "status": "error",
-                    "message": f"Invalid JSON: {str(e)}"
-                })
-                try:
-                    await websocket.send(error_response)
-                except:
-                    pass
             except (websockets.ConnectionClosed, websockets.InvalidMessage, EOFError) as e:
-                print(f"Connection error: {e}")
+                event_log.log("connection_error", level="error", error=str(e))
                 break
             except Exception as e:
-                print(f"Error processing message: {e}")
+                event_log.log("processing_error", level="error", error=str(e))
                 try:
                     error_response = json.dumps({
                         "status": "error",
@@ -264,23 +942,22 @@ async def handle_a2a_client(websocket):
                     pass
                     
     except websockets.exceptions.ConnectionClosed:
-        print(f"A2A client disconnected: {websocket.remote_address}")
-        if client_agent_id and client_agent_id in a2a_server.agents:
-            a2a_server.agents[client_agent_id].status = "offline"
-            print(f"Marked agent {client_agent_id} as offline")
+        event_log.log("client_disconnected", remote_address=str(websocket.remote_address))
     except Exception as e:
-        print(f"A2A connection error: {e}")
-        if client_agent_id and client_agent_id in a2a_server.agents:
-            a2a_server.agents[client_agent_id].status = "offline"
-            print(f"Marked agent {client_agent_id} as offline due to error")
+        event_log.log("connection_error", level="error", error=str(e))
+    finally:
+        await a2a_server.agent_disconnected(websocket)
 
-async def start_a2a_server():
-    print("Starting Fixed A2A Server on ws://localhost:9090")
+async def start_a2a_server(host: str = "localhost", port: int = 9090):
+    print(f"Starting Fixed A2A Server on ws://{host}:{port}")
+    a2a_server.event_log.start()
+    timers = asyncio.create_task(a2a_server.run_timers())
+    server = None
     try:
         server = await websockets.serve(
             handle_a2a_client, 
-            "localhost", 
-            9090,
+            host, 
+            port,
             ping_interval=30,
             ping_timeout=20,
             close_timeout=10,
@@ -291,10 +968,16 @@ async def start_a2a_server():
         await asyncio.Future()
     except Exception as e:
         print(f"A2A Server error: {e}")
+    finally:
+        timers.cancel()
+        if server:
+            server.close()
+            await server.wait_closed()
+        a2a_server.event_log.stop()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(start_a2a_server())
+        asyncio.run(start_a2a_server(port=int(os.getenv("A2A_PORT", "9090"))))
     except KeyboardInterrupt:
         print("A2A Server stopped by user")
     except Exception as e:
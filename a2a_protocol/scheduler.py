@@ -0,0 +1,80 @@
+import time
+from collections import deque
+from typing import Any, List
+
+PRIORITY_CLASSES = {
+    "interactive": 0,
+    "normal": 1,
+    "batch": 2,
+}
+
+def parse_priority(value: Any, default: str = "normal") -> int:
+    if value is None:
+        return PRIORITY_CLASSES[default]
+    if isinstance(value, str):
+        if value.isdigit():
+            value = int(value)
+        else:
+            return PRIORITY_CLASSES.get(value.lower(), PRIORITY_CLASSES[default])
+    return max(0, min(int(value), len(PRIORITY_CLASSES) - 1))
+
+def priority_name(priority: int) -> str:
+    for name, rank in PRIORITY_CLASSES.items():
+        if rank == priority:
+            return name
+    return str(priority)
+
+class PriorityScheduler:
+    def __init__(self, aging_interval: float = 5.0):
+        self.aging_interval = aging_interval
+        self.queues = [deque() for _ in PRIORITY_CLASSES]
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.queues)
+
+    def push(self, item: Any, priority: int, enqueued_at: float = None):
+        self.queues[priority].append((time.monotonic() if enqueued_at is None else enqueued_at, item))
+
+    def promote(self, item: Any, priority: int, new_priority: int) -> bool:
+        enqueued_at = self._take(item, priority)
+        if enqueued_at is None:
+            return False
+        target = self.queues[new_priority]
+        position = next((i for i, (other, _) in enumerate(target) if other > enqueued_at), len(target))
+        target.insert(position, (enqueued_at, item))
+        return True
+
+    def remove(self, item: Any, priority: int) -> bool:
+        return self._take(item, priority) is not None
+
+    def _take(self, item: Any, priority: int) -> float:
+        for index, (enqueued_at, queued) in enumerate(self.queues[priority]):
+            if queued is item:
+                del self.queues[priority][index]
+                return enqueued_at
+        return None
+
+    def _score(self, priority: int, enqueued_at: float, now: float) -> float:
+        if not self.aging_interval:
+            return priority
+        return priority - (now - enqueued_at) / self.aging_interval
+
+    def pop(self, now: float = None) -> Any:
+        now = time.monotonic() if now is None else now
+        best = None
+        best_score = None
+        for priority, queue in enumerate(self.queues):
+            if not queue:
+                continue
+            score = self._score(priority, queue[0][0], now)
+            if best_score is None or score < best_score:
+                best, best_score = priority, score
+        if best is None:
+            return None
+        return self.queues[best].popleft()[1]
+
+    def drain(self) -> List[Any]:
+        items = [item for queue in self.queues for _, item in queue]
+        for queue in self.queues:
+            queue.clear()
+        return items
@@ -0,0 +1,66 @@
+import time
+from typing import Dict, List, Any, Hashable, Set
+
+class TimerWheel:
+    def __init__(self, tick: float = 0.5, slots: int = 512):
+        self.tick = tick
+        self.slots: List[Set[Hashable]] = [set() for _ in range(slots)]
+        self.deadlines: Dict[Hashable, float] = {}
+        self.slot_ticks: Dict[Hashable, int] = {}
+        self.last_tick = self._tick_for(time.monotonic())
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.deadlines
+
+    def _tick_for(self, deadline: float) -> int:
+        return int(deadline / self.tick)
+
+    def _place(self, key: Hashable, deadline: float):
+        tick_no = max(self._tick_for(deadline), self.last_tick + 1)
+        self.slots[tick_no % len(self.slots)].add(key)
+        self.slot_ticks[key] = tick_no
+
+    def schedule(self, key: Hashable, deadline: float):
+        current = self.deadlines.get(key)
+        self.deadlines[key] = deadline
+        if current is not None and deadline >= current:
+            return
+        if current is not None:
+            self.slots[self.slot_ticks[key] % len(self.slots)].discard(key)
+        self._place(key, deadline)
+
+    def cancel(self, key: Hashable) -> bool:
+        if key not in self.deadlines:
+            return False
+        del self.deadlines[key]
+        self.slots[self.slot_ticks.pop(key) % len(self.slots)].discard(key)
+        return True
+
+    def deadline(self, key: Hashable) -> float:
+        return self.deadlines.get(key)
+
+    def advance(self, now: float = None) -> List[Any]:
+        now = time.monotonic() if now is None else now
+        now_tick = self._tick_for(now)
+        start_tick = max(self.last_tick + 1, now_tick - len(self.slots) + 1)
+        expired = []
+        moved = []
+        for tick_no in range(start_tick, now_tick + 1):
+            slot = self.slots[tick_no % len(self.slots)]
+            for key in list(slot):
+                if self.slot_ticks[key] > tick_no:
+                    continue
+                slot.discard(key)
+                if self.deadlines[key] <= now:
+                    del self.deadlines[key]
+                    del self.slot_ticks[key]
+                    expired.append(key)
+                else:
+                    moved.append(key)
+        self.last_tick = max(self.last_tick, now_tick)
+        for key in moved:
+            self._place(key, self.deadlines[key])
+        return expired
@@ -0,0 +1,214 @@
+import argparse
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+
+_current_context: contextvars.ContextVar = contextvars.ContextVar("trace_context", default=None)
+_exporters: Dict[str, "TraceExporter"] = {}
+_exporters_lock = threading.Lock()
+
+def current_context() -> Optional[Dict[str, str]]:
+    return _current_context.get()
+
+def inject(message: Dict[str, Any], context: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    context = context or _current_context.get()
+    if context:
+        message["trace"] = {"trace_id": context["trace_id"], "span_id": context["span_id"]}
+    return message
+
+def extract(message: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    if not isinstance(message, dict):
+        return None
+    trace = message.get("trace")
+    if isinstance(trace, dict) and trace.get("trace_id") and trace.get("span_id"):
+        return {"trace_id": str(trace["trace_id"]), "span_id": str(trace["span_id"])}
+    return None
+
+class TraceExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self.exported = 0
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="trace-exporter", daemon=True)
+        self._writer.start()
+
+    def export(self, record: Dict[str, Any]):
+        self.exported += 1
+        self._queue.put(record)
+
+    def stop(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=2.0)
+
+    def _write_loop(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            lines = [json.dumps(record, default=str)]
+            stop = False
+            while len(lines) < 256:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                lines.append(json.dumps(record, default=str))
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError:
+                pass
+            if stop:
+                break
+
+def _shared_exporter(path: Optional[str]) -> Optional[TraceExporter]:
+    if not path:
+        return None
+    with _exporters_lock:
+        exporter = _exporters.get(path)
+        if exporter is None:
+            exporter = _exporters[path] = TraceExporter(path)
+        return exporter
+
+class Tracer:
+    def __init__(self, service: str, exporter: Optional[TraceExporter] = None):
+        self.service = service
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls, service: str):
+        return cls(service, _shared_exporter(os.getenv("TRACE_EXPORT_PATH")))
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Dict[str, str]] = None, **attrs):
+        if not self.enabled:
+            yield None
+            return
+        parent = parent or _current_context.get()
+        context = {
+            "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+            "span_id": uuid.uuid4().hex[:16]
+        }
+        token = _current_context.set(context)
+        started = time.time()
+        try:
+            yield context
+        except BaseException as e:
+            attrs["error"] = type(e).__name__ if not str(e) else str(e)[:200]
+            raise
+        finally:
+            _current_context.reset(token)
+            self._export(name, context, parent, started, time.time(), attrs)
+
+    def record(self, name: str, started: float, ended: float, parent: Optional[Dict[str, str]] = None, **attrs):
+        if not self.enabled:
+            return
+        parent = parent or _current_context.get()
+        context = {
+            "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+            "span_id": uuid.uuid4().hex[:16]
+        }
+        self._export(name, context, parent, started, ended, attrs)
+
+    def _export(self, name: str, context: Dict[str, str], parent: Optional[Dict[str, str]],
+                started: float, ended: float, attrs: Dict[str, Any]):
+        self.exporter.export({
+            "trace_id": context["trace_id"],
+            "span_id": context["span_id"],
+            "parent_id": parent["span_id"] if parent else None,
+            "name": name,
+            "service": self.service,
+            "start_us": int(started * 1_000_000),
+            "duration_us": max(0, int((ended - started) * 1_000_000)),
+            "attrs": attrs
+        })
+
+def load_spans(path: str, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                span = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if trace_id is None or span["trace_id"].startswith(trace_id):
+                spans.append(span)
+    return spans
+
+def to_chrome_trace(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    events = []
+    traces: Dict[str, int] = {}
+    services: Dict[Any, int] = {}
+    for span in sorted(spans, key=lambda s: s["start_us"]):
+        if span["trace_id"] not in traces:
+            traces[span["trace_id"]] = pid = len(traces) + 1
+            events.append({"ph": "M", "name": "process_name", "pid": pid,
+                           "args": {"name": f"trace {span['trace_id'][:8]} ({span['name']})"}})
+        pid = traces[span["trace_id"]]
+        if (pid, span["service"]) not in services:
+            services[(pid, span["service"])] = tid = len(services) + 1
+            events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": span["service"]}})
+        events.append({
+            "ph": "X",
+            "name": span["name"],
+            "cat": span["service"],
+            "pid": pid,
+            "tid": services[(pid, span["service"])],
+            "ts": span["start_us"],
+            "dur": span["duration_us"],
+            "args": {**span.get("attrs", {}), "span_id": span["span_id"], "parent_id": span["parent_id"]}
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def format_trace_tree(spans: List[Dict[str, Any]]) -> str:
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    known = {span["span_id"] for span in spans}
+    for span in sorted(spans, key=lambda s: s["start_us"]):
+        parent = span["parent_id"] if span["parent_id"] in known else None
+        children.setdefault(parent, []).append(span)
+
+    lines = []
+    def walk(span, depth, origin):
+        offset = (span["start_us"] - origin) / 1000
+        lines.append(f"{'  ' * depth}{span['name']} [{span['service']}] +{offset:.1f} ms, {span['duration_us'] / 1000:.1f} ms")
+        for child in children.get(span["span_id"], []):
+            walk(child, depth + 1, origin)
+
+    for root in children.get(None, []):
+        lines.append(f"trace {root['trace_id']}")
+        walk(root, 1, root["start_us"])
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect spans exported to TRACE_EXPORT_PATH")
+    parser.add_argument("path", help="JSONL span file")
+    parser.add_argument("--trace", help="Only spans of this trace id (prefix)")
+    parser.add_argument("--chrome", metavar="OUT", help="Write a Chrome trace (chrome://tracing, Perfetto) to OUT")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path, args.trace)
+    if args.chrome:
+        with open(args.chrome, "w", encoding="utf-8") as f:
+            json.dump(to_chrome_trace(spans), f)
+        print(f"Wrote {len(spans)} spans to {args.chrome}")
+    else:
+        print(format_trace_tree(spans))
+
+if __name__ == "__main__":
+    main()
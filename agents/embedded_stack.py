@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a_protocol.memory_transport import MemoryHub
+from a2a_protocol.real_a2a_server import a2a_server, handle_a2a_client
+from mcp_server.real_mcp_server import handle_client
+from agents.real_analytics_agent import BulletproofAnalyticsAgent
+
+class EmbeddedStack:
+    def __init__(self, a2a_url: str = None, mcp_url: str = None):
+        self.a2a_url = a2a_url or os.getenv("A2A_SERVER_URL", "ws://localhost:9090")
+        self.mcp_url = mcp_url or os.getenv("MCP_SERVER_URL", "ws://localhost:8080")
+        self.hub = MemoryHub()
+        self.hub.serve(self.a2a_url, handle_a2a_client)
+        self.hub.serve(self.mcp_url, handle_client)
+        self.agent = None
+        self.tasks = []
+
+    @property
+    def connect(self):
+        return self.hub.connect
+
+    async def start(self, timeout: float = 30.0):
+        a2a_server.event_log.start()
+        self.tasks.append(asyncio.create_task(a2a_server.run_timers()))
+        self.agent = BulletproofAnalyticsAgent()
+        self.agent.mcp_server = self.mcp_url
+        self.agent.a2a_server = self.a2a_url
+        self.agent.open_connection = self.hub.connect
+        self.agent.reconnect_delay = 0.5
+        self.tasks.append(asyncio.create_task(self.agent.run()))
+        await self._wait_for_agent(timeout)
+
+    async def _wait_for_agent(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        websocket = await self.hub.connect(self.a2a_url)
+        try:
+            while time.monotonic() < deadline:
+                await websocket.send(json.dumps({"type": "discover_agents", "capability_filter": "trend_analysis"}))
+                if json.loads(await websocket.recv()).get("count"):
+                    return
+                await asyncio.sleep(0.05)
+        finally:
+            await websocket.close()
+        raise RuntimeError("Analytics agent did not register with the embedded A2A server")
+
+    async def stop(self):
+        if self.agent:
+            self.agent.max_reconnect_attempts = 0
+            await self.agent.cleanup_connection()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.hub.close()
+        a2a_server.event_log.stop()
+
+async def main(replay_path: str = None, concurrency: int = 4, timeout: float = 20):
+    from agents.real_main_agent import MainAgent
+
+    stack = EmbeddedStack()
+    print("Starting embedded A2A server, MCP server and analytics agent...")
+    await stack.start()
+    print("Embedded stack ready")
+    agent = MainAgent()
+    agent.a2a_server = stack.a2a_url
+    agent.open_connection = stack.connect
+    agent.task_timeout = timeout
+    try:
+        await agent.run(replay_path, concurrency)
+    finally:
+        await stack.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the A2A server, MCP server and analytics agent in one process over in-memory transports")
+    parser.add_argument("--replay", metavar="FILE", help="JSONL file of queries to replay instead of the interactive prompt")
+    parser.add_argument("--concurrency", type=int, default=4, help="Queries in flight during replay")
+    parser.add_argument("--timeout", type=float, default=20, help="Seconds to wait for each task")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.replay, args.concurrency, args.timeout))
+    except KeyboardInterrupt:
+        print("Embedded stack stopped by user")
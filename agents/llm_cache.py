@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "llm_cache.sqlite3")
+
+class LLMResponseCache:
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, max_entries: int = 512):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.dataset_version = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, dataset_version TEXT, model TEXT, "
+                    "response TEXT, latency REAL, created_at REAL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache disk tier disabled: {e}")
+                self._db = None
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        return cls(path=path or None, max_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512")))
+
+    def make_key(self, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+        prompt_hash = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+        material = json.dumps({
+            "model": model,
+            "prompt": prompt_hash,
+            "params": params,
+            "dataset_version": self.dataset_version
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            self.saved_seconds += entry["latency"]
+            return entry["response"]
+
+        if self._db:
+            row = await asyncio.to_thread(self._db_get, key)
+            if row is not None:
+                response, latency = row
+                self._remember(key, response, latency)
+                self.disk_hits += 1
+                self.saved_seconds += latency
+                return response
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response: str, latency: float, model: str):
+        self._remember(key, response, latency)
+        if self._db:
+            await asyncio.to_thread(self._db_put, key, response, latency, model, self.dataset_version)
+
+    async def set_dataset_version(self, version: Optional[str]):
+        if version == self.dataset_version:
+            return
+        logger.info(f"Dataset version changed {self.dataset_version} -> {version}, invalidating LLM cache")
+        self.dataset_version = version
+        self.memory.clear()
+        if self._db:
+            await asyncio.to_thread(self._db_purge, version)
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "memory_entries": len(self.memory),
+            "dataset_version": self.dataset_version
+        }
+
+    def close(self):
+        if self._db:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, response: str, latency: float):
+        self.memory[key] = {"response": response, "latency": latency}
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _db_get(self, key: str):
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT response, latency FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _db_put(self, key: str, response: str, latency: float, model: str, dataset_version: Optional[str]):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, dataset_version, model, response, latency, time.time())
+            )
+            self._db.commit()
+
+    def _db_purge(self, dataset_version: Optional[str]):
+        with self._db_lock:
+            self._db.execute("DELETE FROM llm_cache WHERE dataset_version IS NOT ?", (dataset_version,))
+            self._db.commit()
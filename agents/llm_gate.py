@@ -0,0 +1,98 @@
+import asyncio
+import json
+import logging
+from typing import Callable, Dict, Any, List, Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+logger = logging.getLogger(__name__)
+
+def create_pooled_client(api_key: Optional[str], max_connections: int, timeout: float) -> AsyncOpenAI:
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=30.0)
+    )
+    return AsyncOpenAI(api_key=api_key, timeout=timeout, max_retries=1, http_client=http_client)
+
+class LLMRequestCoordinator:
+    def __init__(self, client: AsyncOpenAI, max_concurrency: int = 4, timeout: float = 20.0):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = timeout
+        self.inflight: Dict[str, Dict[str, Any]] = {}
+        self.active = 0
+        self.requests = 0
+        self.deduplicated = 0
+        self.aborted = 0
+
+    async def complete(self, model: str, messages: List[Dict[str, Any]], max_tokens: int, temperature: float,
+                       on_delta: Optional[Callable[[str], None]] = None) -> str:
+        self.requests += 1
+        key = json.dumps([model, messages, max_tokens, temperature], sort_keys=True)
+        entry = self.inflight.get(key)
+        if entry is not None:
+            self.deduplicated += 1
+            if on_delta and entry["text"]:
+                on_delta("".join(entry["text"]))
+        else:
+            entry = {
+                "key": key,
+                "params": {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature},
+                "listeners": [],
+                "text": [],
+                "waiters": 0
+            }
+            self.inflight[key] = entry
+            entry["task"] = asyncio.create_task(self._send(entry, stream=on_delta is not None))
+        if on_delta:
+            entry["listeners"].append(on_delta)
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(entry["task"])
+        finally:
+            entry["waiters"] -= 1
+            if on_delta in entry["listeners"]:
+                entry["listeners"].remove(on_delta)
+            if entry["waiters"] == 0 and not entry["task"].done():
+                self.aborted += 1
+                entry["task"].cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "deduplicated": self.deduplicated,
+            "aborted": self.aborted,
+            "in_flight": self.active
+        }
+
+    async def _send(self, entry: Dict[str, Any], stream: bool) -> str:
+        try:
+            async with self.semaphore:
+                self.active += 1
+                try:
+                    if stream:
+                        return await asyncio.wait_for(self._stream(entry), timeout=self.timeout)
+                    response = await asyncio.wait_for(
+                        self.client.chat.completions.create(**entry["params"]),
+                        timeout=self.timeout
+                    )
+                    return response.choices[0].message.content
+                finally:
+                    self.active -= 1
+        finally:
+            if self.inflight.get(entry["key"]) is entry:
+                del self.inflight[entry["key"]]
+
+    async def _stream(self, entry: Dict[str, Any]) -> str:
+        stream = await self.client.chat.completions.create(stream=True, **entry["params"])
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            entry["text"].append(delta)
+            for listener in entry["listeners"]:
+                try:
+                    listener(delta)
+                except Exception as e:
+                    logger.warning(f"LLM stream listener failed: {e}")
+        return "".join(entry["text"])
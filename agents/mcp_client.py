@@ -0,0 +1,137 @@
+import asyncio
+import itertools
+import json
+import logging
+import websockets
+from typing import Dict, Any
+
+from a2a_protocol.tracing import current_context, inject
+
+logger = logging.getLogger(__name__)
+
+class MCPClient:
+    def __init__(self, url: str, client_name: str, client_version: str = "1.0.0", open_connection=None):
+        self.url = url
+        self.open_connection = open_connection or websockets.connect
+        self.client_name = client_name
+        self.client_version = client_version
+        self.websocket = None
+        self.ids = itertools.count(1)
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.reader_task = None
+        self.connect_lock = asyncio.Lock()
+        self.server_info: Dict[str, Any] = {}
+        self.tools: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def connected(self) -> bool:
+        return self.websocket is not None and self.reader_task is not None and not self.reader_task.done()
+
+    async def connect(self, open_timeout: float = 10.0):
+        self.websocket = await self.open_connection(
+            self.url,
+            ping_interval=20,
+            ping_timeout=10,
+            close_timeout=5,
+            max_size=2**20,
+            open_timeout=open_timeout
+        )
+        self.reader_task = asyncio.create_task(self._read_loop(self.websocket))
+        response = await self.request("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": self.client_name, "version": self.client_version}
+        }, timeout=5.0)
+        self.server_info = response.get("result", {}).get("serverInfo", {})
+        await self.refresh_tools()
+
+    async def ensure_connected(self, open_timeout: float = 10.0):
+        async with self.connect_lock:
+            if self.connected:
+                return
+            await self.close()
+            try:
+                await self.connect(open_timeout)
+            except BaseException:
+                await self.close()
+                raise
+
+    async def close(self):
+        websocket, self.websocket = self.websocket, None
+        if websocket:
+            try:
+                await websocket.close()
+            except:
+                pass
+        if self.reader_task:
+            self.reader_task.cancel()
+            self.reader_task = None
+        self._fail_pending(ConnectionError("MCP connection closed"))
+        self.tools = {}
+
+    async def request(self, method: str, params: Dict[str, Any] = None, timeout: float = 10.0) -> Dict[str, Any]:
+        if not self.connected:
+            raise ConnectionError("MCP client is not connected")
+        request_id = next(self.ids)
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        context = current_context()
+        if context:
+            params = dict(params or {})
+            params["_meta"] = inject(dict(params.get("_meta") or {}), context)
+        if params is not None:
+            message["params"] = params
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            await self.websocket.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any], timeout: float = 30.0) -> Dict[str, Any]:
+        response = await self.request("tools/call", {"name": name, "arguments": arguments}, timeout=timeout)
+        if str(response.get("result", {}).get("error", "")).startswith("Unknown tool"):
+            self.tools = {}
+        return response
+
+    async def refresh_tools(self) -> Dict[str, Dict[str, Any]]:
+        response = await self.request("tools/list")
+        tools = response.get("result", {}).get("tools", [])
+        self.tools = {tool["name"]: tool for tool in tools}
+        logger.info(f"Available tools: {list(self.tools)}")
+        return self.tools
+
+    async def _read_loop(self, websocket):
+        try:
+            async for raw in websocket:
+                try:
+                    data = json.loads(raw)
+                except json.JSONDecodeError:
+                    logger.warning("Discarding malformed MCP frame")
+                    continue
+                if "method" in data and "id" not in data:
+                    self._handle_notification(data)
+                    continue
+                future = self.pending.get(data.get("id"))
+                if future and not future.done():
+                    future.set_result(data)
+                else:
+                    logger.warning(f"Discarding MCP response for unknown request {data.get('id')}")
+        except websockets.ConnectionClosed as e:
+            logger.warning(f"MCP connection lost: {e}")
+        finally:
+            if self.websocket is websocket:
+                self.websocket = None
+                self.tools = {}
+            self._fail_pending(ConnectionError("MCP connection lost"))
+
+    def _handle_notification(self, data: Dict[str, Any]):
+        if data.get("method") == "notifications/tools/list_changed":
+            logger.info("MCP tool list changed, invalidating catalogue")
+            self.tools = {}
+
+    def _fail_pending(self, error: Exception):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending.clear()
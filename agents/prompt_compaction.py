@@ -0,0 +1,110 @@
+import os
+import re
+from typing import Dict, Any, List, Optional
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "600"))
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_ITEM_PATTERN = re.compile(r"^\s*-\s*(?P<label>[^:]+):\s*(?P<count>-?\d+(?:\.\d+)?)(?P<rest>.*)$")
+_RECORD_PATTERN = re.compile(r"^\s*\d+\.\s+\S")
+_TOTAL_PATTERN = re.compile(r"^[^-].*:\s*-?\d+(?:\.\d+)?\b")
+_DELTA_PATTERN = re.compile(r"(?<![\w.])[+-]\d+(?:\.\d+)?%|\((?:anomaly|outlier)\)|^\s*-\s*overloaded:", re.IGNORECASE)
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _TOKEN_PATTERN.findall(text))
+
+def _parse_blocks(text: str) -> List[Dict[str, Any]]:
+    blocks = []
+    section = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if blocks and line[:1].isspace() and blocks[-1]["kind"] == "record":
+            blocks[-1]["lines"].append(line)
+            continue
+
+        match = _ITEM_PATTERN.match(line)
+        if match:
+            blocks.append({"kind": "item", "section": section, "lines": [line], "count": float(match.group("count"))})
+        elif _RECORD_PATTERN.match(line):
+            blocks.append({"kind": "record", "section": section, "lines": [line], "count": None})
+        elif stripped.endswith(":"):
+            section = len(blocks)
+            blocks.append({"kind": "header", "section": section, "lines": [line], "count": None})
+        elif not blocks or _TOTAL_PATTERN.match(stripped):
+            blocks.append({"kind": "headline", "section": section, "lines": [line], "count": None})
+        else:
+            blocks.append({"kind": "text", "section": section, "lines": [line], "count": None})
+    return blocks
+
+def _rank_blocks(blocks: List[Dict[str, Any]]) -> List[int]:
+    sections: Dict[Optional[int], List[int]] = {}
+    for index, block in enumerate(blocks):
+        if block["kind"] in ("item", "record", "text"):
+            sections.setdefault(block["section"], []).append(index)
+
+    flagged = []
+    ranked_sections = []
+    for members in sections.values():
+        counts = [blocks[i]["count"] for i in members if blocks[i]["count"] is not None]
+        if len(counts) >= 3:
+            mean = sum(counts) / len(counts)
+            spread = (sum((c - mean) ** 2 for c in counts) / len(counts)) ** 0.5
+            for i in members:
+                count = blocks[i]["count"]
+                if spread and count is not None and abs(count - mean) / spread >= 1.5:
+                    flagged.append(i)
+        members = sorted(members, key=lambda i: -(blocks[i]["count"] or 0))
+        ranked_sections.append(members)
+
+    for index, block in enumerate(blocks):
+        if index not in flagged and block["kind"] in ("item", "text") and _DELTA_PATTERN.search(block["lines"][0]):
+            flagged.append(index)
+
+    order = [i for i, block in enumerate(blocks) if block["kind"] == "headline"]
+    order += [i for i in flagged if i not in order]
+    depth = max((len(members) for members in ranked_sections), default=0)
+    for rank in range(depth):
+        for members in ranked_sections:
+            if rank < len(members) and members[rank] not in order:
+                order.append(members[rank])
+    return order
+
+def compact_tool_output(text: str, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    if not text or estimate_tokens(text) <= token_budget:
+        return text
+
+    blocks = _parse_blocks(text)
+    costs = [estimate_tokens("\n".join(block["lines"])) for block in blocks]
+    chosen = set()
+    full_sections = set()
+    used = estimate_tokens(_omitted_note(len(blocks), token_budget))
+    for index in _rank_blocks(blocks):
+        section = blocks[index]["section"]
+        is_record = blocks[index]["kind"] == "record"
+        if is_record and section in full_sections:
+            continue
+        cost = costs[index]
+        header_cost = costs[section] if section is not None and section != index and section not in chosen and blocks[section]["kind"] == "header" else 0
+        if used + cost + header_cost > token_budget:
+            if is_record:
+                full_sections.add(section)
+            continue
+        chosen.add(index)
+        if header_cost:
+            chosen.add(section)
+        used += cost + header_cost
+
+    omitted = sum(1 for index, block in enumerate(blocks) if index not in chosen and block["kind"] != "header")
+    lines = []
+    for index in sorted(chosen):
+        lines.extend(blocks[index]["lines"])
+    if omitted:
+        lines.append(_omitted_note(omitted, token_budget))
+    return "\n".join(lines)
+
+def _omitted_note(omitted: int, token_budget: int) -> str:
+    return f"({omitted} lower-ranked lines omitted to fit a {token_budget}-token budget)"
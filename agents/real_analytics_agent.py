@@ -4,30 +4,118 @@ import json
 import time
 import logging
 import os
-from openai import OpenAI
+import sys
+import re
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.mcp_client import MCPClient
+from a2a_protocol.tracing import Tracer, extract, inject
+from agents.llm_cache import LLMResponseCache
+from agents.llm_gate import LLMRequestCoordinator, create_pooled_client
+from agents.prompt_compaction import compact_tool_output, estimate_tokens, DEFAULT_TOKEN_BUDGET
+from agents.stats_engine import STATS_COLUMNS, TicketStatsEngine, format_report, is_statistical_query
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PLAN_CLAUSE_SPLIT = re.compile(r"\b(?:and|also|plus|then)\b|[;,]", re.IGNORECASE)
+TREND_HINTS = ["trend", "pattern", "analysis", "analyze", "analyse"]
+SUMMARY_HINTS = ["summary", "overview", "statistics", "total"]
+SEARCH_HINTS = re.compile(r"\b(?:search|find|show|list|assigned|open|closed)\b", re.IGNORECASE)
+
+class TaskProgressReporter:
+    def __init__(self, websocket, task_id, agent_id, flush_interval=0.05):
+        self.websocket = websocket
+        self.task_id = task_id
+        self.agent_id = agent_id
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue()
+        self.tokens = []
+        self.flush_handle = None
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def emit(self, stage, content):
+        self.queue.put_nowait({"stage": stage, "content": content})
+
+    def token(self, delta):
+        self.tokens.append(delta)
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.flush_interval, self._flush_tokens)
+
+    def _flush_tokens(self):
+        self.flush_handle = None
+        if self.tokens:
+            self.emit("llm", "".join(self.tokens))
+            self.tokens = []
+
+    async def close(self):
+        if self.flush_handle:
+            self.flush_handle.cancel()
+        self._flush_tokens()
+        self.queue.put_nowait(None)
+        await self.writer
+
+    def abort(self):
+        if self.flush_handle:
+            self.flush_handle.cancel()
+        self.writer.cancel()
+
+    async def _write_loop(self):
+        while True:
+            chunk = await self.queue.get()
+            if chunk is None:
+                return
+            try:
+                await self.websocket.send(json.dumps({
+                    "type": "task_progress",
+                    "task_id": self.task_id,
+                    "agent_id": self.agent_id,
+                    **chunk
+                }))
+            except Exception as e:
+                logger.warning(f"Dropping progress for task {self.task_id}: {e}")
+
 class BulletproofAnalyticsAgent:
     def __init__(self):
         self.agent_id = "analytics_agent"
         self.name = "Analytics Agent"
-        self.a2a_server = "ws://localhost:9090"
-        self.mcp_server = "ws://localhost:8080"
+        self.a2a_server = os.getenv("A2A_SERVER_URL", "ws://localhost:9090")
+        self.mcp_server = os.getenv("MCP_SERVER_URL", "ws://localhost:8080")
+        self.open_connection = websockets.connect
         self.websocket = None
-        self.mcp_websocket = None
+        self.mcp_client = None
+        self.mcp_connect_lock = asyncio.Lock()
         self.running = False
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 10
         self.reconnect_delay = 5
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.heartbeat_interval = 2.0
+        self.active_tasks = {}
+        self.task_deadlines = {}
+        self.max_concurrent_tasks = int(os.getenv("ANALYTICS_MAX_CONCURRENCY", "8"))
+        self.task_semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+        self.llm_model = os.getenv("ANALYTICS_LLM_MODEL", "gpt-3.5-turbo")
+        self.conversational_model = os.getenv("ANALYTICS_CONVERSATIONAL_MODEL", "gpt-4o-mini")
+        self.llm_timeout = float(os.getenv("LLM_TIMEOUT", "20"))
+        llm_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        self.client = create_pooled_client(os.getenv("OPENAI_API_KEY"), llm_concurrency, self.llm_timeout)
+        self.llm_coordinator = LLMRequestCoordinator(
+            self.client,
+            max_concurrency=llm_concurrency,
+            timeout=self.llm_timeout
+        )
+        self.llm_cache = LLMResponseCache.from_env()
+        self.prompt_token_budget = DEFAULT_TOKEN_BUDGET
+        self.stats_engine = None
+        self.stats_engine_lock = asyncio.Lock()
+        self.tracer = Tracer.from_env("analytics_agent")
 
     async def create_connection(self):
         try:
             logger.info(f"Creating connection to {self.a2a_server}")
             
-            self.websocket = await websockets.connect(
+            self.websocket = await self.open_connection(
                 self.a2a_server,
                 ping_interval=20,
                 ping_timeout=10,
@@ -54,42 +142,25 @@ class BulletproofAnalyticsAgent:
     async def connect_to_mcp(self):
         try:
             logger.info(f"Connecting to MCP server at {self.mcp_server}")
-            self.mcp_websocket = await websockets.connect(
-                self.mcp_server,
-                ping_interval=20,
-                ping_timeout=10,
-                close_timeout=5,
-                max_size=2**20,
-                open_timeout=10
-            )
-            logger.info("MCP server connection established")
-            
-            test_message = {
-                "jsonrpc": "2.0",
-                "id": 999,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {"name": "analytics_agent", "version": "1.0.0"}
-                }
-            }
-            
-            await self.mcp_websocket.send(json.dumps(test_message))
-            response = await asyncio.wait_for(self.mcp_websocket.recv(), timeout=5.0)
-            logger.info("MCP server connection test successful")
+            await self._reset_mcp_connection()
+            self.mcp_client = MCPClient(self.mcp_server, "analytics_agent", open_connection=self.open_connection)
+            await self.mcp_client.connect()
+            await self.llm_cache.set_dataset_version(self.mcp_client.server_info.get("datasetVersion"))
+            logger.info("MCP session initialized")
             return True
             
         except Exception as e:
             logger.error(f"Failed to connect to MCP server: {e}")
-            if self.mcp_websocket:
-                try:
-                    await self.mcp_websocket.close()
-                except:
-                    pass
-                self.mcp_websocket = None
+            await self._reset_mcp_connection()
             return False
 
+    async def _ensure_mcp(self):
+        async with self.mcp_connect_lock:
+            if self.mcp_client and self.mcp_client.connected:
+                return True
+            logger.error("MCP server not connected, attempting to reconnect...")
+            return await self.connect_to_mcp()
+
     async def register_with_a2a(self):
         try:
             if not self.websocket:
@@ -108,7 +179,8 @@ class BulletproofAnalyticsAgent:
                 "endpoint": "ws://localhost:9090",
                 "metadata": {
                     "version": "1.0.0",
-                    "description": "Performs ticket analytics and trend reporting"
+                    "description": "Performs ticket analytics and trend reporting",
+                    "max_concurrent_tasks": self.max_concurrent_tasks
                 }
             }
             
@@ -121,6 +193,7 @@ class BulletproofAnalyticsAgent:
             if result.get("status") == "success":
                 logger.info(f"Successfully registered {self.name}")
                 self.reconnect_attempts = 0
+                self.heartbeat_interval = result.get("heartbeat_interval", self.heartbeat_interval)
                 return True
             else:
                 logger.error(f"Registration failed: {result.get('message')}")
@@ -139,13 +212,20 @@ class BulletproofAnalyticsAgent:
             message_type = data.get("type")
             
             if message_type == "delegate_task":
-                await self.handle_task_delegation(data)
+                self.start_task(data)
             elif message_type == "task_assignment":
-                await self.handle_task_delegation(data)
+                self.start_task(data)
+            elif message_type == "cancel_task":
+                self.handle_task_cancellation(data)
+            elif message_type == "deadline_extended":
+                self.handle_deadline_extension(data)
             elif message_type == "discover_agents":
                 await self.handle_discovery_request()
             elif message_type == "ping":
                 await self.handle_ping()
+            elif message_type == "heartbeat_ack":
+                if data.get("status") != "success":
+                    logger.warning(f"Heartbeat rejected: {data.get('message')}")
             else:
                 logger.warning(f"Unknown message type: {message_type}")
                 
@@ -154,18 +234,77 @@ class BulletproofAnalyticsAgent:
         except Exception as e:
             logger.error(f"Error handling message: {e}")
 
+    def start_task(self, data):
+        task_id = data.get("task_id")
+        task = asyncio.create_task(self.handle_task_delegation(data))
+        self.active_tasks[task_id] = task
+        task.add_done_callback(lambda _: self.active_tasks.pop(task_id, None))
+
+    def handle_task_cancellation(self, data):
+        task_id = data.get("task_id")
+        task = self.active_tasks.get(task_id)
+        if task and not task.done():
+            logger.info(f"Cancelling task {task_id}: {data.get('reason', 'cancelled')}")
+            task.cancel()
+
+    def handle_deadline_extension(self, data):
+        task_id = data.get("task_id")
+        if task_id in self.task_deadlines:
+            logger.info(f"Deadline of task {task_id} extended")
+            self.task_deadlines[task_id] = data.get("deadline")
+
+    async def _run_until_deadline(self, task_id, deadline, coro):
+        work = asyncio.create_task(coro)
+        self.task_deadlines[task_id] = deadline
+        try:
+            while True:
+                deadline = self.task_deadlines.get(task_id)
+                timeout = None if deadline is None else deadline - time.time()
+                if timeout is not None and timeout <= 0:
+                    raise asyncio.TimeoutError()
+                await asyncio.wait({work}, timeout=timeout)
+                if work.done():
+                    return work.result()
+        finally:
+            self.task_deadlines.pop(task_id, None)
+            if not work.done():
+                work.cancel()
+                await asyncio.gather(work, return_exceptions=True)
+
+    async def _process_bounded(self, query, progress=None, response_style=None):
+        waiting = time.time()
+        async with self.task_semaphore:
+            self.tracer.record("agent.queued", waiting, time.time())
+            with self.tracer.span("agent.process"):
+                return await self.process_analytics_task(query, progress, response_style)
+
     async def handle_task_delegation(self, data):
+        with self.tracer.span("agent.task", parent=extract(data), task_id=data.get("task_id")):
+            await self._handle_task_delegation(data)
+
+    async def _handle_task_delegation(self, data):
+        progress = None
         try:
             task_id = data.get("task_id")
             from_agent = data.get("from_agent")
             task_type = data.get("task_type")
             payload = data.get("payload", {})
             query = payload.get("query", "")
+            deadline = data.get("deadline")
             
             logger.info(f"Processing task {task_id} from {from_agent}: {task_type}")
             logger.info(f"Query: {query}")
             
-            result = await self.process_analytics_task(query)
+            if deadline is not None and deadline <= time.time():
+                raise asyncio.TimeoutError()
+            if data.get("stream"):
+                progress = TaskProgressReporter(self.websocket, task_id, self.agent_id)
+            result = await self._run_until_deadline(
+                task_id, deadline, self._process_bounded(query, progress, payload.get("response_style"))
+            )
+            if progress:
+                await progress.close()
+                progress = None
             
             completion_message = {
                 "type": "task_completed",
@@ -175,9 +314,24 @@ class BulletproofAnalyticsAgent:
                 "result": result
             }
             
-            await self.websocket.send(json.dumps(completion_message))
+            await self.websocket.send(json.dumps(inject(completion_message)))
             logger.info(f"Task {task_id} completed and response sent")
             
+        except asyncio.CancelledError:
+            logger.info(f"Task {data.get('task_id')} cancelled before completion")
+        except asyncio.TimeoutError:
+            logger.warning(f"Task {data.get('task_id')} exceeded its deadline")
+            try:
+                failure_message = {
+                    "type": "task_failed",
+                    "task_id": data.get("task_id"),
+                    "from_agent": self.agent_id,
+                    "to_agent": data.get("from_agent"),
+                    "error": "Task deadline exceeded"
+                }
+                await self.websocket.send(json.dumps(inject(failure_message)))
+            except:
+                pass
         except Exception as e:
             logger.error(f"Error handling task delegation: {e}")
             
@@ -189,103 +343,78 @@ class BulletproofAnalyticsAgent:
                     "to_agent": data.get("from_agent"),
                     "error": str(e)
                 }
-                await self.websocket.send(json.dumps(failure_message))
+                await self.websocket.send(json.dumps(inject(failure_message)))
             except:
                 pass
+        finally:
+            if progress:
+                progress.abort()
 
-    async def process_analytics_task(self, query):
+    async def process_analytics_task(self, query, progress=None, response_style=None):
         try:
-            if not self.mcp_websocket:
-                logger.error("MCP server not connected, attempting to reconnect...")
-                if not await self.connect_to_mcp():
+            if not self.mcp_client or not self.mcp_client.connected:
+                if not await self._ensure_mcp():
                     logger.error("Failed to reconnect to MCP server")
                     return {"error": "MCP server not connected and reconnection failed"}
             
-            init_message = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {
-                        "name": "analytics_agent",
-                        "version": "1.0.0"
+            if not self.mcp_client.tools:
+                await self.mcp_client.refresh_tools()
+            
+            plan = self._plan_tool_calls(query)
+            logger.info(f"Tool plan: {[step['tool'] for step in plan]}")
+            steps = await asyncio.gather(*(self._run_plan_step(step) for step in plan))
+            
+            completed = [step for step in steps if "text" in step]
+            if not completed:
+                errors = [str(step["error"]) for step in steps]
+                logger.error(f"MCP tool error: {errors}")
+                if all(error == "MCP server timeout" for error in errors):
+                    return {"error": "MCP server timeout"}
+                return {"error": f"MCP tool error: {'; '.join(errors)}"}
+            
+            tool_to_use = ", ".join(step["tool"] for step in completed)
+            analysis_text = "\n\n".join(step["text"] for step in completed)
+            for step in steps:
+                if "error" in step:
+                    analysis_text += f"\n\n({step['tool']} unavailable: {step['error']})"
+            
+            if progress:
+                progress.emit("raw", analysis_text)
+            
+            if all(step["tool"] == "stats_engine" for step in completed):
+                return {
+                    "summary": f"Analytics completed for: '{query}'",
+                    "details": {
+                        "raw_analysis": analysis_text,
+                        "enhanced_analysis": analysis_text,
+                        "statistics": completed[0]["statistics"],
+                        "response_style": response_style,
+                        "tool_used": tool_to_use,
+                        "plan": self._plan_summary(steps),
+                        "timestamp": time.time()
                     }
                 }
-            }
-            
-            await self.mcp_websocket.send(json.dumps(init_message))
-            init_response = await asyncio.wait_for(self.mcp_websocket.recv(), timeout=10.0)
-            logger.info("MCP server initialized")
             
-            tools_message = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "tools/list"
-            }
-            
-            await self.mcp_websocket.send(json.dumps(tools_message))
-            tools_response = await asyncio.wait_for(self.mcp_websocket.recv(), timeout=10.0)
-            tools_data = json.loads(tools_response)
-            logger.info(f"Available tools: {[tool['name'] for tool in tools_data.get('result', {}).get('tools', [])]}")
-            
-            tool_to_use = self._determine_tool_for_query(query)
-            logger.info(f"Using tool: {tool_to_use}")
-            
-            if tool_to_use == "analyze_ticket_trends":
-                tool_message = {
-                    "jsonrpc": "2.0",
-                    "id": 3,
-                    "method": "tools/call",
-                    "params": {
-                        "name": "analyze_ticket_trends",
-                        "arguments": {"query": query}
-                    }
-                }
-            elif tool_to_use == "get_ticket_summary":
-                tool_message = {
-                    "jsonrpc": "2.0",
-                    "id": 3,
-                    "method": "tools/call",
-                    "params": {
-                        "name": "get_ticket_summary",
-                        "arguments": {}
-                    }
-                }
-            else:
-                tool_message = {
-                    "jsonrpc": "2.0",
-                    "id": 3,
-                    "method": "tools/call",
-                    "params": {
-                        "name": "search_tickets",
-                        "arguments": {"query": query}
-                    }
-                }
-            
-            await self.mcp_websocket.send(json.dumps(tool_message))
-            tool_response = await asyncio.wait_for(self.mcp_websocket.recv(), timeout=30.0)
-            tool_data = json.loads(tool_response)
-            
-            if "error" in tool_data:
-                logger.error(f"MCP tool error: {tool_data['error']}")
-                return {"error": f"MCP tool error: {tool_data['error']}"}
-            
-            result_content = tool_data.get("result", {}).get("content", [])
-            if result_content and len(result_content) > 0:
-                analysis_text = result_content[0].get("text", "No analysis available")
-            else:
-                analysis_text = "No analysis available"
-            
-            enhanced_analysis = await self._enhance_analysis_with_ai(query, analysis_text)
+            compacted_analysis = compact_tool_output(analysis_text, self.prompt_token_budget)
+            enhanced_analysis, cache_hit = await self._enhance_analysis_with_ai(
+                query, compacted_analysis, progress.token if progress else None, response_style
+            )
             
             result = {
                 "summary": f"Analytics completed for: '{query}'",
                 "details": {
                     "raw_analysis": analysis_text,
                     "enhanced_analysis": enhanced_analysis,
+                    "response_style": response_style if enhanced_analysis != compacted_analysis else None,
                     "tool_used": tool_to_use,
+                    "plan": self._plan_summary(steps),
+                    "llm_cache": dict(self.llm_cache.get_stats(), hit=cache_hit),
+                    "llm_requests": self.llm_coordinator.get_stats(),
+                    "prompt_tokens": {
+                        "raw": estimate_tokens(analysis_text),
+                        "compacted": estimate_tokens(compacted_analysis),
+                        "budget": self.prompt_token_budget
+                    },
                     "timestamp": time.time()
                 }
             }
@@ -299,6 +428,108 @@ class BulletproofAnalyticsAgent:
             logger.error(f"Analytics processing failed: {e}")
             return {"error": f"Analytics processing failed: {str(e)}"}
 
+    async def _get_stats_engine(self):
+        async with self.stats_engine_lock:
+            version = self.mcp_client.server_info.get("datasetVersion")
+            if self.stats_engine and self.stats_engine.dataset_version == version:
+                return self.stats_engine
+            if "get_ticket_records" not in self.mcp_client.tools:
+                return None
+            
+            columns = {column: [] for column in STATS_COLUMNS}
+            offset = 0
+            while offset is not None:
+                response = await self.mcp_client.call_tool(
+                    "get_ticket_records", {"columns": STATS_COLUMNS, "offset": offset}, timeout=30.0
+                )
+                structured = response.get("result", {}).get("structuredContent")
+                if not structured:
+                    logger.warning(f"No structured ticket records from MCP server: {response.get('error') or response.get('result', {}).get('error')}")
+                    return None
+                for column in STATS_COLUMNS:
+                    columns[column].extend(structured["columns"][column])
+                offset = structured.get("next_offset")
+            self.stats_engine = TicketStatsEngine(columns, structured.get("datasetVersion"))
+            logger.info(f"Statistics engine loaded {self.stats_engine.size} tickets (dataset {self.stats_engine.dataset_version})")
+            return self.stats_engine
+
+    def _plan_tool_calls(self, query):
+        clauses = [clause.strip() for clause in PLAN_CLAUSE_SPLIT.split(query) if clause.strip()]
+        tools = [self._clause_tool(clause) for clause in clauses]
+        known = [tool for tool in tools if tool]
+        
+        if len(set(known)) < 2:
+            tool = known[0] if known else self._determine_tool_for_query(query)
+            return [self._plan_step(tool, query)]
+        
+        grouped = {}
+        current = known[0]
+        for clause, tool in zip(clauses, tools):
+            current = tool or current
+            grouped.setdefault(current, []).append(clause)
+        return [self._plan_step(tool, " and ".join(tool_clauses)) for tool, tool_clauses in grouped.items()]
+
+    def _clause_tool(self, clause):
+        clause_lower = clause.lower()
+        if is_statistical_query(clause):
+            return "stats_engine"
+        if any(word in clause_lower for word in TREND_HINTS):
+            return "analyze_ticket_trends"
+        if any(word in clause_lower for word in SUMMARY_HINTS):
+            return "get_ticket_summary"
+        if SEARCH_HINTS.search(clause):
+            return "search_tickets"
+        return None
+
+    def _plan_step(self, tool, query):
+        if tool != "stats_engine" and tool not in self.mcp_client.tools:
+            logger.warning(f"Tool {tool} not offered by MCP server, using search_tickets")
+            tool = "search_tickets"
+        return {"tool": tool, "arguments": {} if tool == "get_ticket_summary" else {"query": query}}
+
+    async def _run_plan_step(self, step):
+        with self.tracer.span("agent.tool", tool=step["tool"]):
+            return await self._execute_plan_step(step)
+
+    async def _execute_plan_step(self, step):
+        started = time.perf_counter()
+        try:
+            if step["tool"] == "stats_engine":
+                engine = await self._get_stats_engine()
+                if engine:
+                    step["statistics"] = engine.report(step["arguments"]["query"])
+                    step["text"] = format_report(step["statistics"])
+                    return step
+                step["tool"] = "analyze_ticket_trends"
+            
+            tool_data = await self.mcp_client.call_tool(step["tool"], step["arguments"], timeout=30.0)
+            if "error" in tool_data:
+                step["error"] = tool_data["error"]
+            else:
+                result_content = tool_data.get("result", {}).get("content", [])
+                if result_content and len(result_content) > 0:
+                    step["text"] = result_content[0].get("text", "No analysis available")
+                else:
+                    step["text"] = "No analysis available"
+        except asyncio.TimeoutError:
+            step["error"] = "MCP server timeout"
+        except Exception as e:
+            step["error"] = str(e)
+        finally:
+            step["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return step
+
+    def _plan_summary(self, steps):
+        return [
+            {key: step[key] for key in ("tool", "arguments", "duration_ms", "error") if key in step}
+            for step in steps
+        ]
+
+    async def _reset_mcp_connection(self):
+        if self.mcp_client:
+            await self.mcp_client.close()
+            self.mcp_client = None
+
     def _determine_tool_for_query(self, query):
         query_lower = query.lower()
         
@@ -309,10 +540,37 @@ class BulletproofAnalyticsAgent:
         else:
             return "search_tickets"
 
-    async def _enhance_analysis_with_ai(self, query, raw_analysis):
+    async def _enhance_analysis_with_ai(self, query, raw_analysis, on_delta=None, response_style=None):
         try:
             if not self.client:
-                return raw_analysis
+                return raw_analysis, False
+            
+            if response_style == "conversational":
+                return await self._cached_chat(
+                    [
+                        {"role": "system", "content": "You are a friendly IT support analyst who excels at explaining data insights in clear, conversational language. You help people understand trends and make data-driven decisions."},
+                        {"role": "user", "content": f"""
+            Original Query: "{query}"
+            
+            Analytics Data:
+            {raw_analysis}
+            
+            Please provide a clear, conversational explanation of these analytics results.
+            Structure your response naturally:
+            1. Start with a brief overview of what was found
+            2. Explain the key trends and patterns from the data
+            3. Highlight the important statistics and numbers
+            4. Share actionable recommendations and priority areas for improvement
+            
+            Use natural language, be friendly and professional, and make it easy to understand.
+            Focus on the real data provided, not generic responses.
+            """}
+                    ],
+                    max_tokens=800,
+                    temperature=0.3,
+                    on_delta=on_delta,
+                    model=self.conversational_model
+                )
             
             prompt = f"""
             Based on the following IT ticket analysis data, provide insights and recommendations:
@@ -329,18 +587,36 @@ class BulletproofAnalyticsAgent:
             Format your response as a structured analysis.
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            return await self._cached_chat(
+                [{"role": "user", "content": prompt}],
                 max_tokens=500,
-                temperature=0.7
+                temperature=0.7,
+                on_delta=on_delta
             )
             
-            return response.choices[0].message.content
-            
+        except asyncio.TimeoutError:
+            logger.error(f"AI enhancement timed out after {self.llm_timeout}s")
+            return raw_analysis, False
         except Exception as e:
             logger.error(f"AI enhancement failed: {e}")
-            return raw_analysis
+            return raw_analysis, False
+
+    async def _cached_chat(self, messages, max_tokens, temperature, on_delta=None, model=None):
+        model = model or self.llm_model
+        key = self.llm_cache.make_key(model, messages, {"max_tokens": max_tokens, "temperature": temperature})
+        cached = await self.llm_cache.get(key)
+        if cached is not None:
+            if on_delta:
+                on_delta(cached)
+            return cached, True
+        started = time.monotonic()
+        with self.tracer.span("agent.llm", model=model, max_tokens=max_tokens):
+            content = await self._complete_chat(model, messages, max_tokens, temperature, on_delta)
+        await self.llm_cache.put(key, content, time.monotonic() - started, model)
+        return content, False
+
+    async def _complete_chat(self, model, messages, max_tokens, temperature, on_delta=None):
+        return await self.llm_coordinator.complete(model, messages, max_tokens, temperature, on_delta)
 
     async def handle_discovery_request(self):
         try:
@@ -367,9 +643,19 @@ class BulletproofAnalyticsAgent:
         except Exception as e:
             logger.error(f"Error handling ping: {e}")
 
+    async def heartbeat_loop(self):
+        while self.running and self.websocket:
+            try:
+                await self.websocket.send(json.dumps({"type": "heartbeat", "agent_id": self.agent_id}))
+            except Exception as e:
+                logger.warning(f"Heartbeat failed: {e}")
+                break
+            await asyncio.sleep(self.heartbeat_interval)
+
     async def message_loop(self):
         logger.info("Starting message loop...")
         self.running = True
+        heartbeat_task = asyncio.create_task(self.heartbeat_loop())
         
         try:
             while self.running and self.websocket:
@@ -393,6 +679,9 @@ class BulletproofAnalyticsAgent:
             logger.error(f"Error in message loop: {e}")
         finally:
             self.running = False
+            heartbeat_task.cancel()
+            for task in list(self.active_tasks.values()):
+                task.cancel()
             logger.info("Message loop stopped")
 
     async def run(self):
@@ -439,12 +728,7 @@ class BulletproofAnalyticsAgent:
                 pass
             self.websocket = None
         
-        if self.mcp_websocket:
-            try:
-                await self.mcp_websocket.close()
-            except:
-                pass
-            self.mcp_websocket = None
+        await self._reset_mcp_connection()
 
 async def main():
     agent = BulletproofAnalyticsAgent()
@@ -1,20 +1,29 @@
+import argparse
 import asyncio
 import websockets
 import json
+import math
 import time
+import uuid
+from collections import OrderedDict
 
 class MainAgent:
     def __init__(self):
         self.agent_id = "main_agent"
         self.name = "Main Agent"
         self.a2a_server = "ws://localhost:9090"
+        self.open_connection = websockets.connect
         self.a2a_ws = None
         self.agents = {}
-        self.task_responses = {}
+        self.task_responses = OrderedDict()
+        self.pending_requests = {}
+        self.pending_tasks = {}
+        self.heartbeat_interval = 2.0
+        self.task_timeout = 20
 
     async def connect_a2a(self):
         try:
-            self.a2a_ws = await websockets.connect(self.a2a_server)
+            self.a2a_ws = await self.open_connection(self.a2a_server)
             reg = {
                 "type": "agent_register",
                 "agent_id": self.agent_id,
@@ -31,6 +40,7 @@ class MainAgent:
             print("Registered Main Agent on A2A")
 
             asyncio.create_task(self.listen_a2a())
+            asyncio.create_task(self.heartbeat_a2a())
 
             await self.a2a_ws.send(json.dumps({"type": "discover_agents"}))
         except Exception as e:
@@ -43,56 +53,172 @@ class MainAgent:
                 msg = await self.a2a_ws.recv()
                 data = json.loads(msg)
 
-                if data.get("status") == "success" and data.get("agents"):
+                if data.get("heartbeat_interval"):
+                    self.heartbeat_interval = data["heartbeat_interval"]
+
+                request = self.pending_requests.pop(data.get("request_id"), None)
+                if request is not None:
+                    if not request.done():
+                        request.set_result(data)
+
+                elif data.get("status") == "success" and data.get("agents"):
                     for a in data["agents"]:
                         self.agents[a["agent_id"]] = a
                     print("Agents discovered:", list(self.agents.keys()))
 
-                elif data.get("type") == "task_completed":
-                    self.task_responses[data["task_id"]] = data
-                    print(f"Task completed from {data.get('from_agent')}")
+                elif data.get("type") in ("task_completed", "task_failed"):
+                    self._finish_task(data)
 
         except websockets.ConnectionClosed:
             print("A2A connection lost — reconnecting...")
+            self._fail_pending(ConnectionError("A2A connection lost"))
             await asyncio.sleep(2)
             await self.connect_a2a()
 
-    async def delegate_task(self, query: str):
+    async def heartbeat_a2a(self):
+        ws = self.a2a_ws
+        try:
+            while ws is self.a2a_ws:
+                await ws.send(json.dumps({"type": "heartbeat", "agent_id": self.agent_id}))
+                await asyncio.sleep(self.heartbeat_interval)
+        except websockets.ConnectionClosed:
+            pass
+
+    def _finish_task(self, data):
+        waiters = self.pending_tasks.pop(data["task_id"], [])
+        for future in waiters:
+            if not future.done():
+                future.set_result(data)
+        if not waiters:
+            self.task_responses[data["task_id"]] = data
+            while len(self.task_responses) > 1000:
+                self.task_responses.popitem(last=False)
+
+    def _fail_pending(self, error):
+        futures = list(self.pending_requests.values())
+        for waiters in self.pending_tasks.values():
+            futures.extend(waiters)
+        self.pending_requests.clear()
+        self.pending_tasks.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    async def delegate_task(self, query: str, verbose: bool = True):
         analytics = [a for a in self.agents if "analytics_agent" in a]
         if not analytics:
             print("No analytics agent found.")
             return None
 
         target = analytics[0]
-        task_id = str(int(time.time()))
+        request_id = str(uuid.uuid4())
         task = {
             "type": "delegate_task",
             "from_agent": self.agent_id,
             "to_agent": target,
-            "task_id": task_id,
+            "request_id": request_id,
             "task_type": "trend_analysis",
+            "priority": "interactive",
+            "timeout": self.task_timeout,
             "payload": {"query": query},
         }
 
-        await self.a2a_ws.send(json.dumps(task))
-        print(f"Sent task '{query}' to {target}")
+        loop = asyncio.get_running_loop()
+        accepted = loop.create_future()
+        self.pending_requests[request_id] = accepted
+        try:
+            await self.a2a_ws.send(json.dumps(task))
+            if verbose:
+                print(f"Sent task '{query}' to {target}")
+            ack = await asyncio.wait_for(accepted, timeout=5)
+        except (asyncio.TimeoutError, ConnectionError, websockets.ConnectionClosed) as e:
+            print(f"Delegation of '{query}' failed: {e or 'no acknowledgement'}")
+            return None
+        finally:
+            self.pending_requests.pop(request_id, None)
 
-        for _ in range(20):
-            if task_id in self.task_responses:
-                result = self.task_responses[task_id]["result"]
-                print("Received result:", json.dumps(result, indent=2))
-                return result
-            await asyncio.sleep(1)
+        if ack.get("status") != "success":
+            print(f"Delegation of '{query}' rejected: {ack.get('message')}")
+            return None
 
-        print("⏰ Timeout waiting for Analytics Agent response.")
-        return None
+        task_id = ack["task_id"]
+        finished = self.task_responses.get(task_id)
+        if finished is None:
+            future = loop.create_future()
+            self.pending_tasks.setdefault(task_id, []).append(future)
+            try:
+                finished = await asyncio.wait_for(future, timeout=self.task_timeout)
+            except asyncio.TimeoutError:
+                self.pending_tasks.pop(task_id, None)
+                await self.a2a_ws.send(json.dumps({
+                    "type": "cancel_task",
+                    "task_id": task_id,
+                    "from_agent": self.agent_id,
+                    "reason": "caller timed out",
+                }))
+                print("⏰ Timeout waiting for Analytics Agent response.")
+                return None
+            except ConnectionError as e:
+                print(f"Task {task_id} lost: {e}")
+                return None
+
+        if finished.get("type") == "task_failed":
+            print(f"Task {task_id} failed: {finished.get('error')}")
+            return None
 
-    async def run(self):
+        result = finished["result"]
+        if verbose:
+            print("Received result:", json.dumps(result, indent=2))
+        return result
+
+    async def replay(self, path: str, concurrency: int):
+        queries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    record = record.get("query") or record.get("body") or record.get("title")
+                if record:
+                    queries.append(str(record))
+
+        limit = asyncio.Semaphore(concurrency)
+        latencies = []
+        failures = 0
+
+        async def send(query):
+            nonlocal failures
+            async with limit:
+                started = time.perf_counter()
+                result = await self.delegate_task(query, verbose=False)
+                if result is None:
+                    failures += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+
+        print(f"Replaying {len(queries)} queries from {path} with {concurrency} in flight")
+        started = time.perf_counter()
+        await asyncio.gather(*(send(query) for query in queries))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        print(f"\nCompleted {len(latencies)}/{len(queries)} queries in {elapsed:.2f}s ({failures} failed)")
+        print(f"Throughput: {len(latencies) / elapsed:.2f} queries/s")
+        if latencies:
+            for label, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+                print(f"Latency {label}: {_percentile(latencies, q) * 1000:.0f} ms")
+
+    async def run(self, replay_path: str = None, concurrency: int = 4):
         await self.connect_a2a()
         await asyncio.sleep(2)
 
+        if replay_path:
+            await self.replay(replay_path, concurrency)
+            return
+
         while True:
-            query = input("\nYour query: ")
+            query = await asyncio.to_thread(input, "\nYour query: ")
             if query.lower() == "exit":
                 break
             result = await self.delegate_task(query)
@@ -103,6 +229,17 @@ class MainAgent:
                 print("No response received.")
 
 
+def _percentile(ordered, q):
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Main Agent: interactive queries or JSONL replay against the A2A pipeline")
+    parser.add_argument("--replay", metavar="FILE", help="JSONL file of queries (query, body or title field) to send non-interactively")
+    parser.add_argument("--concurrency", type=int, default=4, help="Queries in flight during replay")
+    parser.add_argument("--timeout", type=float, default=20, help="Seconds to wait for each task")
+    args = parser.parse_args()
+
     main = MainAgent()
-    asyncio.run(main.run())
+    main.task_timeout = args.timeout
+    asyncio.run(main.run(args.replay, args.concurrency))
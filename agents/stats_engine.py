@@ -0,0 +1,210 @@
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+DAY = 86400
+OPEN_STATUSES = ("Open", "In Progress")
+AGE_BUCKETS = [0, 3, 8, 15, 31, np.inf]
+AGE_LABELS = ["0-2 days", "3-7 days", "8-14 days", "15-30 days", "31+ days"]
+CATEGORIES = ["network", "email", "software", "hardware", "access"]
+PRIORITIES = ["critical", "high", "medium", "low"]
+STATISTICAL_KEYWORDS = [
+    "aging", "backlog", "anomal", "outlier", "z-score", "week over week", "week-over-week", "wow",
+    "weekly", "imbalance", "workload", "load balance", "overload"
+]
+
+LABEL_COLUMNS = ["category", "status", "priority", "assigned_to"]
+STATS_COLUMNS = LABEL_COLUMNS + ["created_date"]
+
+def is_statistical_query(query: str) -> bool:
+    query_lower = query.lower()
+    return any(keyword in query_lower for keyword in STATISTICAL_KEYWORDS)
+
+class TicketStatsEngine:
+    def __init__(self, columns: Dict[str, List[str]], dataset_version: Optional[str] = None):
+        self.dataset_version = dataset_version
+        self.size = len(columns.get("created_date", []))
+        self.created = np.array(columns["created_date"], dtype="datetime64[s]").astype(np.int64)
+        self.reference = int(self.created.max()) if self.size else 0
+        self.age_days = (self.reference - self.created) / DAY
+        self.labels: Dict[str, np.ndarray] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        for name in LABEL_COLUMNS:
+            self.labels[name], self.codes[name] = np.unique(np.array(columns[name]), return_inverse=True)
+
+    @classmethod
+    def from_structured(cls, structured: Dict[str, Any]):
+        return cls(structured["columns"], structured.get("datasetVersion"))
+
+    def mask(self, category: Optional[str] = None, priority: Optional[str] = None, status: Optional[str] = None) -> np.ndarray:
+        selected = np.ones(self.size, dtype=bool)
+        for name, value in (("category", category), ("priority", priority), ("status", status)):
+            if value is not None:
+                matches = np.flatnonzero(np.char.lower(self.labels[name].astype(str)) == value.lower())
+                selected &= np.isin(self.codes[name], matches)
+        return selected
+
+    def _open_mask(self) -> np.ndarray:
+        return np.isin(self.codes["status"], np.flatnonzero(np.isin(self.labels["status"], OPEN_STATUSES)))
+
+    def backlog_aging(self, selected: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        backlog = self._open_mask() if selected is None else self._open_mask() & selected
+        ages = self.age_days[backlog]
+        if ages.size == 0:
+            return {"open_tickets": 0}
+        counts, _ = np.histogram(ages, bins=AGE_BUCKETS)
+        priority_codes = self.codes["priority"][backlog]
+        by_priority = {}
+        for code, label in enumerate(self.labels["priority"]):
+            priority_ages = ages[priority_codes == code]
+            if priority_ages.size:
+                by_priority[str(label)] = round(float(np.median(priority_ages)), 1)
+        return {
+            "open_tickets": int(ages.size),
+            "median_age_days": round(float(np.median(ages)), 1),
+            "p90_age_days": round(float(np.percentile(ages, 90)), 1),
+            "oldest_age_days": round(float(ages.max()), 1),
+            "buckets": dict(zip(AGE_LABELS, counts.tolist())),
+            "median_age_by_priority": by_priority
+        }
+
+    def category_anomalies(self, recent_days: int = 7, threshold: float = 2.0) -> Dict[str, Any]:
+        days = (self.age_days // 1).astype(np.int64)
+        span = int(days.max()) + 1 if self.size else 0
+        if span <= recent_days + 1:
+            return {"categories": {}, "anomalies": []}
+        categories = len(self.labels["category"])
+        daily = np.bincount(self.codes["category"] * span + days, minlength=categories * span).reshape(categories, span)
+        recent = daily[:, :recent_days].mean(axis=1)
+        baseline = daily[:, recent_days:]
+        mean = baseline.mean(axis=1)
+        std = baseline.std(axis=1)
+        z = np.divide(recent - mean, std / np.sqrt(recent_days), out=np.zeros(categories), where=std > 0)
+        scores = {
+            str(label): {
+                "recent_daily": round(float(recent[i]), 2),
+                "baseline_daily": round(float(mean[i]), 2),
+                "z_score": round(float(z[i]), 2)
+            }
+            for i, label in enumerate(self.labels["category"])
+        }
+        anomalies = [label for label, score in scores.items() if abs(score["z_score"]) >= threshold]
+        return {"window_days": recent_days, "threshold": threshold, "categories": scores, "anomalies": anomalies}
+
+    def week_over_week(self, by: str = "category", selected: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        weeks = (self.age_days // 7).astype(np.int64)
+        groups = len(self.labels[by])
+        chosen = np.ones(self.size, dtype=bool) if selected is None else selected
+        this_week = np.bincount(self.codes[by][chosen & (weeks == 0)], minlength=groups)
+        last_week = np.bincount(self.codes[by][chosen & (weeks == 1)], minlength=groups)
+        delta = this_week - last_week
+        pct = np.divide(delta * 100.0, last_week, out=np.zeros(groups), where=last_week > 0)
+        rows = {
+            str(label): {
+                "this_week": int(this_week[i]),
+                "last_week": int(last_week[i]),
+                "delta": int(delta[i]),
+                "delta_pct": round(float(pct[i]), 1)
+            }
+            for i, label in enumerate(self.labels[by]) if this_week[i] or last_week[i]
+        }
+        return {
+            "by": by,
+            "total_this_week": int(this_week.sum()),
+            "total_last_week": int(last_week.sum()),
+            "groups": rows
+        }
+
+    def assignee_imbalance(self, top: int = 5) -> Dict[str, Any]:
+        backlog = self._open_mask()
+        counts = np.bincount(self.codes["assigned_to"][backlog], minlength=len(self.labels["assigned_to"]))
+        present = np.flatnonzero(counts)
+        if present.size == 0:
+            return {"assignees_with_backlog": 0}
+        load = counts[present]
+        names = self.labels["assigned_to"][present]
+        mean = float(load.mean())
+        std = float(load.std())
+        ordered = np.sort(load)
+        gini = float((2 * np.arange(1, ordered.size + 1) - ordered.size - 1).dot(ordered) / (ordered.size * ordered.sum()))
+        order = np.argsort(-load, kind="stable")[:top]
+        return {
+            "assignees_with_backlog": int(load.size),
+            "mean_open_per_assignee": round(mean, 2),
+            "coefficient_of_variation": round(std / mean, 2) if mean else 0.0,
+            "gini": round(gini, 3),
+            "max_to_mean": round(float(load.max()) / mean, 2) if mean else 0.0,
+            "most_loaded": {str(names[i]): int(load[i]) for i in order},
+            "overloaded": [str(names[i]) for i in np.flatnonzero(load >= mean + 2 * std)] if std else []
+        }
+
+    def report(self, query: str) -> Dict[str, Any]:
+        query_lower = query.lower()
+        category = next((c for c in CATEGORIES if c in query_lower), None)
+        priority = next((p for p in PRIORITIES if p in query_lower), None)
+        selected = self.mask(category=category, priority=priority)
+        sections = {
+            "aging": any(word in query_lower for word in ["aging", "backlog", "oldest"]),
+            "anomalies": any(word in query_lower for word in ["anomal", "outlier", "z-score", "spike"]),
+            "week_over_week": any(word in query_lower for word in ["week", "wow", "delta"]),
+            "imbalance": any(word in query_lower for word in ["imbalance", "workload", "load", "assignee"])
+        }
+        if not any(sections.values()):
+            sections = {name: True for name in sections}
+
+        report: Dict[str, Any] = {
+            "filters": {"category": category, "priority": priority},
+            "tickets_considered": int(selected.sum()),
+            "dataset_version": self.dataset_version
+        }
+        if sections["aging"]:
+            report["backlog_aging"] = self.backlog_aging(selected)
+        if sections["anomalies"]:
+            report["category_anomalies"] = self.category_anomalies()
+        if sections["week_over_week"]:
+            report["week_over_week"] = self.week_over_week("category" if category is None else "priority", selected)
+        if sections["imbalance"]:
+            report["assignee_imbalance"] = self.assignee_imbalance()
+        return report
+
+def format_report(report: Dict[str, Any]) -> str:
+    filters = ", ".join(f"{name}={value}" for name, value in report["filters"].items() if value) or "all tickets"
+    text = f"Ticket Statistics ({filters}, {report['tickets_considered']} tickets)\n"
+
+    aging = report.get("backlog_aging")
+    if aging is not None:
+        text += "\nBacklog Aging:\n"
+        text += f"- Open tickets: {aging['open_tickets']}\n"
+        if aging["open_tickets"]:
+            text += f"- Median age: {aging['median_age_days']} days (p90 {aging['p90_age_days']}, oldest {aging['oldest_age_days']})\n"
+            for bucket, count in aging["buckets"].items():
+                text += f"- {bucket}: {count}\n"
+            for priority, age in aging["median_age_by_priority"].items():
+                text += f"- Median age {priority}: {age} days\n"
+
+    anomalies = report.get("category_anomalies")
+    if anomalies is not None:
+        text += f"\nCategory Anomalies (last {anomalies.get('window_days', 7)} days vs baseline):\n"
+        for category, score in anomalies["categories"].items():
+            marker = " (anomaly)" if category in anomalies["anomalies"] else ""
+            text += f"- {category}: z {score['z_score']:+.2f}, {score['recent_daily']}/day vs {score['baseline_daily']}/day{marker}\n"
+        if not anomalies["anomalies"]:
+            text += "- No category beyond the anomaly threshold\n"
+
+    wow = report.get("week_over_week")
+    if wow is not None:
+        text += f"\nWeek over Week by {wow['by']}:\n"
+        text += f"- Total: {wow['total_this_week']} this week vs {wow['total_last_week']} last week\n"
+        for group, row in sorted(wow["groups"].items(), key=lambda item: -abs(item[1]["delta"])):
+            text += f"- {group}: {row['this_week']} vs {row['last_week']} ({row['delta_pct']:+.1f}%)\n"
+
+    imbalance = report.get("assignee_imbalance")
+    if imbalance is not None:
+        text += "\nAssignee Load Imbalance:\n"
+        text += f"- Assignees with open tickets: {imbalance['assignees_with_backlog']}\n"
+        if imbalance["assignees_with_backlog"]:
+            text += f"- Mean open per assignee: {imbalance['mean_open_per_assignee']} (CV {imbalance['coefficient_of_variation']}, Gini {imbalance['gini']})\n"
+            for assignee, count in imbalance["most_loaded"].items():
+                text += f"- {assignee}: {count} open tickets\n"
+            if imbalance["overloaded"]:
+                text += f"- Overloaded: {', '.join(imbalance['overloaded'])}\n"
+    return text
@@ -0,0 +1,390 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from agents.mcp_client import MCPClient
+from ui.connection_pool import WebSocketPool
+
+ANALYTICS_QUERIES = [
+    "Analyze trends in network issues",
+    "What patterns do you see in high priority tickets?",
+    "Give me insight into hardware failures",
+    "Show backlog aging for critical tickets",
+    "Week over week ticket deltas by category"
+]
+DIRECT_CALLS = [
+    ("get_ticket_summary", {}),
+    ("search_tickets", {"query": "network"}),
+    ("search_tickets", {"query": "email"})
+]
+HOPS = ["pool_wait", "a2a_routing", "queue_and_tools", "llm_first_token", "llm_complete", "mcp_call", "total"]
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+class LoadStack:
+    def __init__(self, args):
+        self.args = args
+        self.a2a_url = f"ws://localhost:{args.a2a_port}"
+        self.mcp_url = f"ws://localhost:{args.mcp_port}"
+        self.stub_url = f"http://127.0.0.1:{args.stub_port}"
+        self.processes: List[subprocess.Popen] = []
+        self.tasks: List[asyncio.Task] = []
+        self.stub = None
+        self.embedded = None
+        self.open_connection = websockets.connect
+
+    def _environment(self) -> Dict[str, str]:
+        return {
+            "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "stub",
+            "OPENAI_BASE_URL": f"{self.stub_url}/v1",
+            "A2A_SERVER_URL": self.a2a_url,
+            "MCP_SERVER_URL": self.mcp_url,
+            "A2A_PORT": str(self.args.a2a_port),
+            "MCP_PORT": str(self.args.mcp_port),
+            "LLM_CACHE_PATH": "",
+            "A2A_LOG_SAMPLE_RATES": os.getenv("A2A_LOG_SAMPLE_RATES", "task_status=0,heartbeat=0,task_progress=0"),
+            "A2A_LOG_DEFAULT_SAMPLE_RATE": os.getenv("A2A_LOG_DEFAULT_SAMPLE_RATE", "0")
+        }
+
+    async def start(self):
+        os.environ.update(self._environment())
+        if self.args.mode == "subprocess":
+            await self._start_subprocesses()
+        elif self.args.mode == "embedded":
+            await self._start_embedded()
+            return
+        else:
+            await self._start_in_process()
+        await self._wait_for_agent()
+
+    async def _start_in_process(self):
+        from benchmarks.stub_openai_server import StubLLMConfig, serve_stub
+        from a2a_protocol.real_a2a_server import start_a2a_server
+        from mcp_server.real_mcp_server import start_mcp_server
+        from agents.real_analytics_agent import BulletproofAnalyticsAgent
+
+        config = StubLLMConfig(self.args.llm_latency, self.args.llm_jitter, self.args.llm_tokens, self.args.token_delay)
+        self.stub = await serve_stub(config, port=self.args.stub_port)
+        self.tasks.append(asyncio.create_task(start_a2a_server(port=self.args.a2a_port)))
+        self.tasks.append(asyncio.create_task(start_mcp_server(port=self.args.mcp_port)))
+        await _wait_for_port(self.args.a2a_port)
+        await _wait_for_port(self.args.mcp_port)
+        self.tasks.append(asyncio.create_task(BulletproofAnalyticsAgent().run()))
+
+    async def _start_embedded(self):
+        from benchmarks.stub_openai_server import StubLLMConfig, serve_stub
+        from agents.embedded_stack import EmbeddedStack
+
+        config = StubLLMConfig(self.args.llm_latency, self.args.llm_jitter, self.args.llm_tokens, self.args.token_delay)
+        self.stub = await serve_stub(config, port=self.args.stub_port)
+        self.embedded = EmbeddedStack(self.a2a_url, self.mcp_url)
+        await self.embedded.start()
+        self.open_connection = self.embedded.connect
+
+    async def _start_subprocesses(self):
+        env = {**os.environ, **self._environment()}
+        output = None if self.args.verbose else subprocess.DEVNULL
+
+        def spawn(*command):
+            self.processes.append(subprocess.Popen([sys.executable, *command], cwd=ROOT, env=env, stdout=output, stderr=output))
+
+        spawn("-m", "benchmarks.stub_openai_server", "--port", str(self.args.stub_port),
+              "--latency", str(self.args.llm_latency), "--jitter", str(self.args.llm_jitter),
+              "--tokens", str(self.args.llm_tokens), "--token-delay", str(self.args.token_delay))
+        spawn(os.path.join("a2a_protocol", "real_a2a_server.py"))
+        spawn(os.path.join("mcp_server", "real_mcp_server.py"))
+        for port in (self.args.stub_port, self.args.a2a_port, self.args.mcp_port):
+            await _wait_for_port(port, timeout=30)
+        spawn(os.path.join("agents", "real_analytics_agent.py"))
+
+    async def _wait_for_agent(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                async with websockets.connect(self.a2a_url) as websocket:
+                    await websocket.send(json.dumps({"type": "discover_agents", "capability_filter": "trend_analysis"}))
+                    if json.loads(await websocket.recv()).get("count"):
+                        return
+            except OSError:
+                pass
+            await asyncio.sleep(0.2)
+        raise RuntimeError("Analytics agent did not register with the A2A server")
+
+    async def llm_stats(self) -> Dict[str, Any]:
+        try:
+            async with httpx.AsyncClient() as client:
+                return (await client.get(f"{self.stub_url}/stats", timeout=2.0)).json()
+        except Exception:
+            return {}
+
+    async def stop(self):
+        if self.embedded:
+            await self.embedded.stop()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.stub:
+            self.stub.should_exit = True
+            await asyncio.sleep(0.5)
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+async def _wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Nothing is listening on port {port}")
+
+class LoadDriver:
+    def __init__(self, stack: LoadStack, args):
+        self.stack = stack
+        self.args = args
+        self.a2a_pool = WebSocketPool("a2a", lambda: stack.open_connection(stack.a2a_url, max_size=2**22), args.connections)
+        self.mcp_client = MCPClient(stack.mcp_url, "load_test", open_connection=stack.open_connection)
+        self.sequence = 0
+
+    async def run_step(self, rate: float) -> Dict[str, Any]:
+        samples: List[Dict[str, Any]] = []
+        in_flight = 0
+        peak = 0
+        llm_before = await self.stack.llm_stats()
+
+        async def issue():
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                samples.append(await self._issue_one())
+            finally:
+                in_flight -= 1
+
+        started = time.perf_counter()
+        arrivals = []
+        next_arrival = started
+        while next_arrival - started < self.args.duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            arrivals.append(asyncio.create_task(issue()))
+            next_arrival += random.expovariate(rate)
+        await asyncio.gather(*arrivals)
+        elapsed = time.perf_counter() - started
+        llm_after = await self.stack.llm_stats()
+
+        return self._summarize(rate, samples, elapsed, self.args.duration, peak, llm_before, llm_after)
+
+    async def _issue_one(self) -> Dict[str, Any]:
+        self.sequence += 1
+        if random.random() < self.args.analytics_share:
+            query = random.choice(ANALYTICS_QUERIES)
+            if self.args.unique:
+                query = f"{query} (run {self.sequence})"
+            kind, call = "analytics", self._analytics(query)
+        else:
+            tool, arguments = random.choice(DIRECT_CALLS)
+            kind, call = "mcp", self._direct(tool, arguments)
+
+        started = time.perf_counter()
+        sample = {"kind": kind, "hops": {}}
+        try:
+            sample["hops"] = await asyncio.wait_for(call, timeout=self.args.timeout)
+        except asyncio.TimeoutError:
+            sample["error"] = "timeout"
+        except Exception as e:
+            sample["error"] = type(e).__name__ if not str(e) else str(e)[:80]
+        sample["hops"]["total"] = time.perf_counter() - started
+        return sample
+
+    async def _analytics(self, query: str) -> Dict[str, float]:
+        hops = {}
+        started = time.perf_counter()
+        request_id = str(uuid.uuid4())
+        async with self.a2a_pool.connection() as websocket:
+            connected = time.perf_counter()
+            hops["pool_wait"] = connected - started
+            await websocket.send(json.dumps({
+                "type": "delegate_task",
+                "from_agent": "load_test",
+                "to_agent": "analytics_agent",
+                "capability": "trend_analysis",
+                "task_type": "analyze_trends",
+                "priority": "interactive",
+                "timeout": self.args.timeout,
+                "stream": True,
+                "request_id": request_id,
+                "payload": {"query": query}
+            }))
+            task_id = None
+            tools_done = None
+            while True:
+                data = json.loads(await websocket.recv())
+                now = time.perf_counter()
+                if data.get("request_id") == request_id:
+                    if data.get("status") != "success":
+                        raise RuntimeError(data.get("message", "delegation rejected"))
+                    task_id = data["task_id"]
+                    hops["a2a_routing"] = now - connected
+                    accepted = now
+                elif task_id is None or data.get("task_id") != task_id:
+                    continue
+                elif data.get("type") == "task_progress":
+                    if data.get("stage") == "raw" and tools_done is None:
+                        tools_done = now
+                        hops["queue_and_tools"] = now - accepted
+                    elif data.get("stage") == "llm" and tools_done is not None and "llm_first_token" not in hops:
+                        hops["llm_first_token"] = now - tools_done
+                elif data.get("type") == "task_completed":
+                    if tools_done is not None and "llm_first_token" in hops:
+                        hops["llm_complete"] = now - tools_done
+                    elif tools_done is None:
+                        hops["queue_and_tools"] = now - accepted
+                    return hops
+                elif data.get("type") == "task_failed":
+                    raise RuntimeError(data.get("error") or "task failed")
+
+    async def _direct(self, tool: str, arguments: Dict[str, Any]) -> Dict[str, float]:
+        started = time.perf_counter()
+        await self.mcp_client.ensure_connected()
+        response = await self.mcp_client.call_tool(tool, arguments)
+        if "error" in response:
+            raise RuntimeError(str(response["error"])[:80])
+        return {"mcp_call": time.perf_counter() - started}
+
+    def _summarize(self, rate: float, samples: List[Dict[str, Any]], elapsed: float, duration: float, peak: int,
+                   llm_before: Dict[str, Any], llm_after: Dict[str, Any]) -> Dict[str, Any]:
+        succeeded = [sample for sample in samples if "error" not in sample]
+        errors: Dict[str, int] = {}
+        for sample in samples:
+            if "error" in sample:
+                errors[sample["error"]] = errors.get(sample["error"], 0) + 1
+
+        hops = {}
+        for hop in HOPS:
+            values = sorted(sample["hops"][hop] for sample in succeeded if hop in sample["hops"])
+            if values:
+                hops[hop] = {
+                    "count": len(values),
+                    "p50_ms": round(_percentile(values, 0.50) * 1000, 1),
+                    "p95_ms": round(_percentile(values, 0.95) * 1000, 1),
+                    "p99_ms": round(_percentile(values, 0.99) * 1000, 1)
+                }
+
+        return {
+            "offered_rate": rate,
+            "issued": len(samples),
+            "arrival_rate": round(len(samples) / duration, 2),
+            "achieved_rate": round(len(succeeded) / max(elapsed, duration), 2),
+            "drain_seconds": round(max(0.0, elapsed - duration), 2),
+            "error_rate": round((len(samples) - len(succeeded)) / len(samples), 3) if samples else 0.0,
+            "errors": errors,
+            "peak_in_flight": peak,
+            "llm_requests": llm_after.get("requests", 0) - llm_before.get("requests", 0),
+            "llm_max_in_flight": llm_after.get("max_in_flight"),
+            "hops": hops
+        }
+
+def _print_step(step: Dict[str, Any], saturated: bool):
+    marker = "  << saturated" if saturated else ""
+    print(f"\nOffered {step['offered_rate']:g} req/s ({step['issued']} issued, {step['arrival_rate']} req/s actual): "
+          f"achieved {step['achieved_rate']} req/s, drain {step['drain_seconds']}s, error rate {step['error_rate']:.1%}, "
+          f"peak in flight {step['peak_in_flight']}, {step['llm_requests']} LLM calls{marker}")
+    for error, count in step["errors"].items():
+        print(f"  error x{count}: {error}")
+    print(f"  {'hop':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for hop, stats in step["hops"].items():
+        print(f"  {hop:<16}{stats['count']:>6}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+def _is_saturated(step: Dict[str, Any], baseline_p95: Optional[float], args) -> bool:
+    if step["error_rate"] > args.max_error_rate:
+        return True
+    if not baseline_p95:
+        return False
+    if step["drain_seconds"] * 1000 > args.latency_factor * baseline_p95:
+        return True
+    total = step["hops"].get("total")
+    return bool(total and total["p95_ms"] > args.latency_factor * baseline_p95)
+
+async def main_async(args):
+    stack = LoadStack(args)
+    await stack.start()
+    driver = LoadDriver(stack, args)
+    results = []
+    saturation_point = None
+    baseline_p95 = None
+    try:
+        for rate in args.rates:
+            step = await driver.run_step(rate)
+            saturated = _is_saturated(step, baseline_p95, args)
+            if baseline_p95 is None and "total" in step["hops"]:
+                baseline_p95 = step["hops"]["total"]["p95_ms"]
+            step["saturated"] = saturated
+            if saturated and saturation_point is None:
+                saturation_point = rate
+            results.append(step)
+            _print_step(step, saturated)
+    finally:
+        await driver.mcp_client.close()
+        await driver.a2a_pool.close()
+        await stack.stop()
+
+    if saturation_point is None:
+        print(f"\nNo saturation up to {args.rates[-1]:g} req/s")
+    else:
+        print(f"\nSaturation point: {saturation_point:g} req/s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"mode": args.mode, "saturation_point": saturation_point, "steps": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test of the UI -> A2A -> analytics agent -> MCP -> LLM path")
+    parser.add_argument("--mode", choices=["inprocess", "subprocess", "embedded"], default="inprocess")
+    parser.add_argument("--rates", type=lambda text: [float(rate) for rate in text.split(",")], default=[2.0, 5.0, 10.0, 20.0],
+                        help="Comma-separated arrival rates (requests/s) to step through")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of arrivals per rate")
+    parser.add_argument("--analytics-share", type=float, default=0.7, help="Fraction of requests delegated to the analytics agent")
+    parser.add_argument("--unique", action=argparse.BooleanOptionalAction, default=True,
+                        help="Make analytics queries unique so coalescing and caches do not hide load")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--connections", type=int, default=64, help="Maximum A2A connections held by the driver")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub LLM seconds before the first token")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-tokens", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--latency-factor", type=float, default=3.0, help="p95 growth over the first step that counts as saturated")
+    parser.add_argument("--stub-port", type=int, default=8600)
+    parser.add_argument("--a2a-port", type=int, default=9190)
+    parser.add_argument("--mcp-port", type=int, default=8180)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show service output in subprocess mode")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Dict, Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+class StubLLMConfig:
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, tokens: int = 60, token_delay: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.aborted = 0
+
+def _completion_text(messages, tokens: int) -> str:
+    prompt = messages[-1].get("content", "") if messages else ""
+    first_line = next((line.strip() for line in prompt.splitlines() if line.strip()), "")
+    words = [f"Stub analysis of {len(prompt)} prompt characters: {first_line[:80]}"]
+    words.extend(f"insight{i}" for i in range(max(0, tokens - len(words[0].split()))))
+    return " ".join(words)
+
+def create_app(config: StubLLMConfig) -> FastAPI:
+    app = FastAPI(title="Stub OpenAI-compatible server")
+
+    async def _simulate_latency():
+        delay = config.latency + random.uniform(-config.jitter, config.jitter)
+        await asyncio.sleep(max(0.0, delay))
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": config.requests, "in_flight": config.in_flight, "max_in_flight": config.max_in_flight,
+                "aborted": config.aborted}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body: Dict[str, Any] = await request.json()
+        config.requests += 1
+        config.in_flight += 1
+        config.max_in_flight = max(config.max_in_flight, config.in_flight)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "stub-model")
+        text = _completion_text(body.get("messages", []), min(config.tokens, body.get("max_tokens") or config.tokens))
+
+        if body.get("stream"):
+            async def events():
+                try:
+                    await _simulate_latency()
+                    for index, word in enumerate(text.split(" ")):
+                        chunk = {
+                            "id": completion_id,
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [{
+                                "index": 0,
+                                "delta": {"content": word if index == 0 else f" {word}"},
+                                "finish_reason": None
+                            }]
+                        }
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                        if config.token_delay:
+                            await asyncio.sleep(config.token_delay)
+                    done = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+                    }
+                    yield f"data: {json.dumps(done)}\n\n"
+                    yield "data: [DONE]\n\n"
+                finally:
+                    config.in_flight -= 1
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        async def generate():
+            await _simulate_latency()
+            if config.token_delay:
+                await asyncio.sleep(config.token_delay * len(text.split(" ")))
+
+        work = asyncio.create_task(generate())
+        try:
+            while not work.done():
+                await asyncio.wait({work}, timeout=0.05)
+                if not work.done() and await request.is_disconnected():
+                    work.cancel()
+                    config.aborted += 1
+                    return JSONResponse({"error": {"message": "client disconnected"}}, status_code=499)
+        finally:
+            config.in_flight -= 1
+
+        prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in body.get("messages", []))
+        completion_tokens = len(text.split(" "))
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    return app
+
+async def serve_stub(config: StubLLMConfig, host: str = "127.0.0.1", port: int = 8600) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host=host, port=port, log_level="warning"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub for offline benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--tokens", type=int, default=60, help="Completion length in words")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed tokens")
+    args = parser.parse_args()
+
+    config = StubLLMConfig(args.latency, args.jitter, args.tokens, args.token_delay)
+    print(f"Stub OpenAI server on http://{args.host}:{args.port}/v1 (set OPENAI_BASE_URL to use it)")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
 import json
 import asyncio
+import hashlib
 import websockets
+from contextlib import nullcontext
 from typing import Dict, List, Any
 from dataclasses import dataclass
 import pandas as pd
 import os
+import sys
 from openai import OpenAI
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a_protocol.tracing import Tracer, extract
+
+RECORDS_PAGE_SIZE = int(os.getenv("MCP_RECORDS_PAGE_SIZE", "2000"))
+
 @dataclass
 class MCPTool:
     name: str
@@ -25,6 +34,8 @@ class MCPServer:
         self.tools: Dict[str, MCPTool] = {}
         self.resources: Dict[str, MCPResource] = {}
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.dataset_version = "empty"
+        self.tracer = Tracer.from_env("mcp_server")
         self.df = self._load_data()
         self._register_tools()
         self._register_resources()
@@ -32,6 +43,8 @@ class MCPServer:
     def _load_data(self):
         data_path = os.path.join(os.path.dirname(__file__), "../data/dummy_it_tickets.csv")
         try:
+            with open(data_path, "rb") as f:
+                self.dataset_version = hashlib.sha256(f.read()).hexdigest()[:16]
             df = pd.read_csv(data_path)
             return df
         except Exception as e:
@@ -84,6 +97,19 @@ class MCPServer:
                 "required": ["query"]
             }
         )
+        
+        self.tools["get_ticket_records"] = MCPTool(
+            name="get_ticket_records",
+            description="Get ticket fields as columnar structured data for local statistics",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "columns": {"type": "array", "items": {"type": "string"}, "description": "Columns to return"},
+                    "offset": {"type": "integer", "description": "First row of the page"},
+                    "limit": {"type": "integer", "description": f"Rows per page (at most {RECORDS_PAGE_SIZE})"}
+                }
+            }
+        )
     
     def _register_resources(self):
         self.resources["tickets_data"] = MCPResource(
@@ -102,7 +128,8 @@ class MCPServer:
             },
             "serverInfo": {
                 "name": "IT Tickets MCP Server",
-                "version": "1.0.0"
+                "version": "1.0.0",
+                "datasetVersion": self.dataset_version
             }
         }
     
@@ -139,6 +166,8 @@ class MCPServer:
             return await self._get_ticket_summary()
         elif name == "analyze_ticket_trends":
             return await self._analyze_ticket_trends(arguments.get("query", ""))
+        elif name == "get_ticket_records":
+            return await self._get_ticket_records(arguments.get("columns"), arguments.get("offset", 0), arguments.get("limit"))
         else:
             return {"error": f"Unknown tool: {name}"}
     
@@ -315,6 +344,31 @@ class MCPServer:
             
             return {"content": [{"type": "text", "text": trend_text}]}
     
+    async def _get_ticket_records(self, columns: List[str] = None, offset: int = 0, limit: int = None) -> Dict[str, Any]:
+        if self.df.empty:
+            return {"error": "No data available"}
+        
+        columns = columns or ["ticket_id", "category", "subcategory", "status", "priority", "assigned_to", "created_date"]
+        unknown = [column for column in columns if column not in self.df.columns]
+        if unknown:
+            return {"error": f"Unknown columns: {', '.join(unknown)}"}
+        
+        offset = max(0, int(offset or 0))
+        limit = min(RECORDS_PAGE_SIZE, max(1, int(limit or RECORDS_PAGE_SIZE)))
+        page = self.df.iloc[offset:offset + limit]
+        end = offset + len(page)
+        records = {column: page[column].astype(str).tolist() for column in columns}
+        return {
+            "content": [{"type": "text", "text": f"Ticket records {offset}-{end} of {len(self.df)} with columns: {', '.join(columns)}"}],
+            "structuredContent": {
+                "rows": len(self.df),
+                "offset": offset,
+                "next_offset": end if end < len(self.df) else None,
+                "columns": records,
+                "datasetVersion": self.dataset_version
+            }
+        }
+    
     def _analyze_workload(self) -> str:
         workload = self.df['assigned_to'].value_counts()
         top_assignees = workload.head(10)
@@ -367,50 +421,67 @@ class MCPServer:
             return json.dumps({"error": {"code": -32700, "message": "Parse error"}})
         
         if "method" not in data:
-            return json.dumps({"error": {"code": -32600, "message": "Invalid Request"}})
+            return json.dumps({"error": {"code": -32600, "message": "Invalid Request"}, "id": data.get("id")})
         
         method = data.get("method")
         params = data.get("params", {})
         request_id = data.get("id")
         
-        try:
-            if method == "initialize":
-                result = await self.handle_initialize(params)
-            elif method == "tools/list":
-                result = await self.handle_tools_list()
-            elif method == "resources/list":
-                result = await self.handle_resources_list()
-            elif method == "tools/call":
-                tool_name = params.get("name")
-                arguments = params.get("arguments", {})
-                result = await self.handle_tools_call(tool_name, arguments)
-            else:
-                return json.dumps({"error": {"code": -32601, "message": "Method not found"}})
+        parent = extract(params.get("_meta")) if isinstance(params, dict) else None
+        with self.tracer.span(f"mcp.{method}", parent=parent, tool=params.get("name")) if parent else nullcontext():
+            try:
+                if method == "initialize":
+                    result = await self.handle_initialize(params)
+                elif method == "ping":
+                    result = {}
+                elif method == "tools/list":
+                    result = await self.handle_tools_list()
+                elif method == "resources/list":
+                    result = await self.handle_resources_list()
+                elif method == "tools/call":
+                    tool_name = params.get("name")
+                    arguments = params.get("arguments", {})
+                    result = await self.handle_tools_call(tool_name, arguments)
+                else:
+                    return json.dumps({"error": {"code": -32601, "message": "Method not found"}, "id": request_id})
             
-            return json.dumps({"result": result, "id": request_id})
+                return json.dumps({"result": result, "id": request_id})
             
-        except Exception as e:
-            return json.dumps({"error": {"code": -32603, "message": str(e)}, "id": request_id})
+            except Exception as e:
+                return json.dumps({"error": {"code": -32603, "message": str(e)}, "id": request_id})
 
 mcp_server = MCPServer()
 
 async def handle_client(websocket):
+    pending = set()
+    
+    async def respond(message):
+        response = await mcp_server.handle_message(message)
+        try:
+            await websocket.send(response)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+    
     try:
         async for message in websocket:
-            response = await mcp_server.handle_message(message)
-            await websocket.send(response)
+            task = asyncio.create_task(respond(message))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
     except websockets.exceptions.ConnectionClosed:
         pass
     except Exception as e:
         print(f"Error handling client: {e}")
+    finally:
+        for task in pending:
+            task.cancel()
 
-async def start_mcp_server():
-    print("Starting MCP Server on ws://localhost:8080")
+async def start_mcp_server(host: str = "localhost", port: int = 8080):
+    print(f"Starting MCP Server on ws://{host}:{port}")
     try:
         async with websockets.serve(
             handle_client, 
-            "localhost", 
-            8080,
+            host, 
+            port,
             ping_interval=30,
             ping_timeout=20,
             close_timeout=10
@@ -421,11 +492,11 @@ async def start_mcp_server():
         print(f"MCP Server error: {e}")
         print("Restarting MCP Server in 5 seconds...")
         await asyncio.sleep(5)
-        await start_mcp_server()
+        await start_mcp_server(host, port)
 
 if __name__ == "__main__":
     try:
-        asyncio.run(start_mcp_server())
+        asyncio.run(start_mcp_server(port=int(os.getenv("MCP_PORT", "8080"))))
     except KeyboardInterrupt:
         print("MCP Server stopped by user")
     except Exception as e:
@@ -0,0 +1,18 @@
+import json
+
+class RecordingSocket:
+    def __init__(self, name: str = "socket"):
+        self.remote_address = ("test", name)
+        self.close_code = None
+        self.sent = []
+
+    async def send(self, message):
+        if self.close_code is not None:
+            raise ConnectionError("socket closed")
+        self.sent.append(json.loads(message))
+
+    async def close(self):
+        self.close_code = 1000
+
+    def of_type(self, message_type):
+        return [message for message in self.sent if message.get("type") == message_type]
@@ -0,0 +1,31 @@
+import asyncio
+
+from a2a_protocol.real_a2a_server import A2AServer
+from fakes import RecordingSocket
+
+def test_coalesced_duplicates_are_reported_once_per_batch():
+    async def scenario():
+        server = A2AServer(lease_ttl=60)
+        agent = RecordingSocket("agent")
+        await server.register_agent({"agent_id": "analytics_agent", "capabilities": ["trend_analysis"]}, agent)
+        client = RecordingSocket("ui")
+        accepted = await server.delegate_batch({"from_agent": "ui", "capability": "trend_analysis",
+                                                "task_type": "analyze_trends",
+                                                "queries": ["network trends", "Network trends?", "email trends"]}, client)
+        duplicate, _, other = accepted["task_ids"]
+        assert accepted["task_ids"][1] == duplicate and other != duplicate
+
+        await server.complete_task(duplicate, {"summary": "done"})
+
+        progress = client.of_type("batch_progress")
+        assert [message["task_id"] for message in progress] == [duplicate]
+        assert progress[0]["completed"] == 2 and progress[0]["total"] == 3
+        assert client.of_type("batch_completed") == []
+
+        await server.complete_task(other, {"summary": "done"})
+
+        assert [message["task_id"] for message in client.of_type("batch_progress")] == [duplicate, other]
+        completed = client.of_type("batch_completed")
+        assert len(completed) == 1 and completed[0]["succeeded"] == 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+import asyncio
+
+from a2a_protocol.real_a2a_server import A2AServer
+from fakes import RecordingSocket
+
+def _task(from_agent):
+    return {"from_agent": from_agent, "to_agent": "analytics_agent", "task_type": "analyze_trends",
+            "stream": True, "payload": {"query": "network trends"}}
+
+async def _server_with_agent():
+    server = A2AServer(lease_ttl=60)
+    agent = RecordingSocket("agent")
+    await server.register_agent({"agent_id": "analytics_agent", "capabilities": ["trend_analysis"]}, agent)
+    return server, agent
+
+def test_detached_caller_stops_receiving_pushes():
+    async def scenario():
+        server, agent = await _server_with_agent()
+        first, second = RecordingSocket("first"), RecordingSocket("second")
+        task_id = (await server.delegate_task(_task("first_ui"), websocket=first))["task_id"]
+        await server.delegate_task(_task("second_ui"), websocket=second)
+
+        response = await server.cancel_task({"task_id": task_id, "from_agent": "second_ui"}, second)
+        assert response["status"] == "success"
+        assert server.tasks[task_id].subscribers == []
+
+        await server.task_progress({"task_id": task_id, "stage": "analysis", "content": "..."}, agent)
+        await server.complete_task(task_id, {"summary": "done"})
+
+        assert [message["type"] for message in first.sent] == ["task_progress", "task_completed"]
+        assert second.sent == []
+
+    asyncio.run(scenario())
+
+def test_cancel_from_an_unattached_caller_is_rejected():
+    async def scenario():
+        server, _ = await _server_with_agent()
+        first, second = RecordingSocket("first"), RecordingSocket("second")
+        task_id = (await server.delegate_task(_task("first_ui"), websocket=first))["task_id"]
+        await server.delegate_task(_task("second_ui"), websocket=second)
+
+        response = await server.cancel_task({"task_id": task_id, "from_agent": "stranger"}, RecordingSocket("stranger"))
+
+        assert response["status"] == "error"
+        assert len(server.tasks[task_id].subscribers) == 1 and len(server.tasks[task_id].stream_to) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from a2a_protocol.real_a2a_server import A2AServer
+from agents.real_analytics_agent import BulletproofAnalyticsAgent
+from fakes import RecordingSocket
+
+async def _server_with_agent():
+    server = A2AServer(lease_ttl=60)
+    server.timers.tick = 0.05
+    agent = RecordingSocket("agent")
+    await server.register_agent({"agent_id": "analytics_agent", "capabilities": ["trend_analysis"]}, agent)
+    return server, agent
+
+def _task(timeout, from_agent="ui"):
+    return {"from_agent": from_agent, "to_agent": "analytics_agent", "task_type": "analyze_trends",
+            "timeout": timeout, "payload": {"query": "network trends"}}
+
+def test_deadline_expiry_fails_the_task_and_cancels_the_agent():
+    async def scenario():
+        server, agent = await _server_with_agent()
+        timers = asyncio.create_task(server.run_timers())
+        try:
+            response = await server.delegate_task(_task(0.2))
+            assert agent.of_type("task_assignment")[0]["deadline"] is not None
+            await asyncio.sleep(0.5)
+            task = server.tasks[response["task_id"]]
+            assert task.status == "failed"
+            assert agent.of_type("cancel_task") == [
+                {"type": "cancel_task", "task_id": task.task_id, "reason": "deadline exceeded"}
+            ]
+        finally:
+            timers.cancel()
+
+    asyncio.run(scenario())
+
+def test_coalesced_caller_extends_the_running_agent_deadline():
+    async def scenario():
+        server, agent = await _server_with_agent()
+        timers = asyncio.create_task(server.run_timers())
+        try:
+            first = await server.delegate_task(_task(0.2))
+            second = await server.delegate_task(_task(5, from_agent="other"))
+            assert second["coalesced"] and second["task_id"] == first["task_id"]
+            extension = agent.of_type("deadline_extended")
+            assert len(extension) == 1 and extension[0]["deadline"] > time.time() + 4
+            await asyncio.sleep(0.5)
+            assert server.tasks[first["task_id"]].status == "in_progress"
+            assert agent.of_type("cancel_task") == []
+        finally:
+            timers.cancel()
+
+    asyncio.run(scenario())
+
+@pytest.fixture
+def analytics_agent():
+    return BulletproofAnalyticsAgent()
+
+def test_agent_enforces_its_local_deadline(analytics_agent):
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await analytics_agent._run_until_deadline("t1", time.time() + 0.1, asyncio.sleep(1))
+        assert analytics_agent.task_deadlines == {}
+
+    asyncio.run(scenario())
+
+def test_agent_honours_a_deadline_extension(analytics_agent):
+    async def scenario():
+        async def extend():
+            await asyncio.sleep(0.05)
+            analytics_agent.handle_deadline_extension({"task_id": "t1", "deadline": time.time() + 1})
+
+        extender = asyncio.create_task(extend())
+        result = await analytics_agent._run_until_deadline("t1", time.time() + 0.1, asyncio.sleep(0.3, result="done"))
+        await extender
+        assert result == "done"
+
+    asyncio.run(scenario())
@@ -0,0 +1,101 @@
+import asyncio
+
+from a2a_protocol.real_a2a_server import A2AServer
+from a2a_protocol.timer_wheel import TimerWheel
+from fakes import RecordingSocket
+
+def test_timer_wheel_expires_in_deadline_order():
+    wheel = TimerWheel(tick=0.1, slots=8)
+    wheel.last_tick = wheel._tick_for(99.0)
+    wheel.schedule("a", 99.55)
+    wheel.schedule("b", 99.25)
+    wheel.schedule("far", 200.0)
+    assert wheel.advance(99.35) == ["b"]
+    wheel.schedule("a", 99.85)
+    assert wheel.advance(99.65) == []
+    assert wheel.advance(99.95) == ["a"]
+    assert wheel.cancel("far") and len(wheel) == 0
+
+async def _register(server, agent_id, capabilities=("trend_analysis",)):
+    websocket = RecordingSocket(agent_id)
+    await server.register_agent({"agent_id": agent_id, "capabilities": list(capabilities)}, websocket)
+    return websocket
+
+def test_expired_lease_reroutes_and_cancels_on_the_hung_agent():
+    async def scenario():
+        server = A2AServer(lease_ttl=60)
+        first = await _register(server, "first")
+        second = await _register(server, "second")
+        response = await server.delegate_task({"from_agent": "ui", "capability": "trend_analysis", "task_type": "analyze_trends",
+                                               "payload": {"query": "network trends"}})
+        task = server.tasks[response["task_id"]]
+        hung, healthy = (first, second) if task.to_agent == "first" else (second, first)
+        hung_id = task.to_agent
+        attempts = task.attempts
+
+        await server.expire_agent(hung_id)
+
+        assert server.agents[hung_id].status == "unresponsive"
+        assert hung.of_type("cancel_task") == [
+            {"type": "cancel_task", "task_id": task.task_id, "reason": "agent lease expired"}
+        ]
+        assert task.to_agent != hung_id and task.status == "in_progress" and task.attempts == attempts + 1
+        assert healthy.of_type("task_assignment")[0]["task_id"] == task.task_id
+
+    asyncio.run(scenario())
+
+def test_heartbeat_revives_an_unresponsive_agent():
+    async def scenario():
+        server = A2AServer(lease_ttl=60)
+        websocket = await _register(server, "agent")
+        await server.expire_agent("agent")
+        assert server.agents["agent"].status == "unresponsive"
+        ack = await server.heartbeat({"agent_id": "agent"}, websocket)
+        assert ack["status"] == "success"
+        assert server.agents["agent"].status == "available"
+
+    asyncio.run(scenario())
+
+def test_timer_loop_survives_a_failing_callback():
+    async def scenario():
+        server = A2AServer(lease_ttl=60)
+        server.timers.tick = 0.02
+        expired = []
+
+        async def expire_task(task_id):
+            expired.append(task_id)
+            if task_id == "bad":
+                raise KeyError(task_id)
+
+        server.expire_task = expire_task
+        now = asyncio.get_running_loop().time()
+        server.timers.schedule(("deadline", "bad"), now + 0.03)
+        server.timers.schedule(("deadline", "later"), now + 0.15)
+        timers = asyncio.create_task(server.run_timers())
+        await asyncio.sleep(0.3)
+        assert not timers.done()
+        timers.cancel()
+        assert expired == ["bad", "later"]
+
+    asyncio.run(scenario())
+
+def test_finished_task_notification_tolerates_a_caller_disconnecting():
+    async def scenario():
+        server = A2AServer(lease_ttl=60)
+        agent = await _register(server, "agent")
+
+        class DisconnectingSocket(RecordingSocket):
+            async def send(self, message):
+                await super().send(message)
+                await server.agent_disconnected(self)
+
+        caller = DisconnectingSocket("caller")
+        await server.register_agent({"agent_id": "caller", "capabilities": []}, caller)
+        response = await server.delegate_task({"from_agent": "caller", "to_agent": "agent", "task_type": "analyze_trends",
+                                               "payload": {"query": "x"}, "stream": True}, websocket=caller)
+        await server.complete_task(response["task_id"], {"summary": "done"})
+        assert [message["type"] for message in caller.of_type("task_completed")] == ["task_completed"]
+        assert server.tasks[response["task_id"]].status == "completed"
+        assert agent.of_type("task_assignment")
+
+    asyncio.run(scenario())
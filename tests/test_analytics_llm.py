@@ -0,0 +1,20 @@
+import asyncio
+
+from agents.real_analytics_agent import BulletproofAnalyticsAgent
+
+def test_conversational_answers_use_the_conversational_model():
+    async def scenario():
+        agent = BulletproofAnalyticsAgent()
+        models = []
+
+        async def complete(model, messages, max_tokens, temperature, on_delta=None):
+            models.append(model)
+            return "answer"
+
+        agent._complete_chat = complete
+        await agent._enhance_analysis_with_ai("network trends", "raw", response_style="conversational")
+        await agent._enhance_analysis_with_ai("network trends", "raw")
+        assert models == [agent.conversational_model, agent.llm_model]
+        assert agent.conversational_model == "gpt-4o-mini"
+
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+from ui.health_monitor import HealthMonitor
+
+class FakeMCPClient:
+    async def ensure_connected(self, open_timeout):
+        pass
+
+    async def request(self, method, timeout):
+        return {"result": {}}
+
+class DiscoverySocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.close_code = None
+        self.replies = []
+
+    async def send(self, message):
+        assert json.loads(message)["type"] == "discover_agents"
+        self.replies.append(json.dumps({"status": "success", "agents": [{"agent_id": "analytics_agent"}]}))
+
+    async def recv(self):
+        await asyncio.sleep(self.delay)
+        return self.replies.pop(0)
+
+    async def close(self):
+        self.close_code = 1000
+
+def test_probe_uses_its_own_reused_connection():
+    async def scenario():
+        opened = []
+
+        async def open_a2a():
+            opened.append(DiscoverySocket())
+            return opened[-1]
+
+        monitor = HealthMonitor(open_a2a, FakeMCPClient(), ttl=0)
+        for _ in range(3):
+            status = await monitor._refresh()
+            assert status["a2a_server"]["status"] == "up"
+            assert status["analytics_agent"]["status"] == "up"
+        assert len(opened) == 1
+
+    asyncio.run(scenario())
+
+def test_timed_out_probe_connection_is_replaced():
+    async def scenario():
+        opened = []
+
+        async def open_a2a():
+            opened.append(DiscoverySocket(delay=0.5 if not opened else 0))
+            return opened[-1]
+
+        monitor = HealthMonitor(open_a2a, FakeMCPClient(), ttl=0, timeout=0.1)
+        assert (await monitor._refresh())["a2a_server"]["status"] == "timeout"
+        assert opened[0].close_code is not None
+        assert (await monitor._refresh())["a2a_server"]["status"] == "up"
+        assert len(opened) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,29 @@
+import asyncio
+
+from ui.full_agent_app import AgentUIManager
+
+def _manager(primary_delay, hedge_result):
+    manager = AgentUIManager(mcp_client=object(), client=object())
+    manager.hedge_delay = 0.01
+    manager.latency_target = 0.02
+
+    async def primary(query, fallback=True):
+        await asyncio.sleep(primary_delay)
+        return {"status": "success", "approach": "analytics_agent", "result": {"summary": "agent"}}
+
+    async def hedge(query):
+        return hedge_result
+
+    manager.delegate_to_analytics_agent = primary
+    manager._fallback_trend_analysis = hedge
+    return manager
+
+def test_failed_hedge_does_not_cancel_the_primary():
+    failed = {"status": "error", "message": "AI response failed: timeout", "query": "trends"}
+    result = asyncio.run(_manager(0.1, failed)._hedged_analytics("trends"))
+    assert result["approach"] == "analytics_agent"
+
+def test_successful_hedge_wins_after_the_latency_target():
+    fallback = {"status": "success", "approach": "mcp_trend_analysis", "result": {"content": []}}
+    result = asyncio.run(_manager(1.0, fallback)._hedged_analytics("trends"))
+    assert result["approach"] == "mcp_trend_analysis" and result["plain_render"] is True
@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+
+from agents.llm_gate import LLMRequestCoordinator
+
+class FakeCompletions:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        content = f"reply to {params['messages'][-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def _coordinator(delay: float = 0.05, **kwargs):
+    completions = FakeCompletions(delay)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return LLMRequestCoordinator(client, **kwargs), completions
+
+def _complete(coordinator, prompt):
+    return coordinator.complete("model", [{"role": "user", "content": prompt}], 100, 0.3)
+
+def test_identical_prompts_share_one_request():
+    async def scenario():
+        coordinator, completions = _coordinator()
+        results = await asyncio.gather(_complete(coordinator, "a"), _complete(coordinator, "a"), _complete(coordinator, "b"))
+        assert results == ["reply to a", "reply to a", "reply to b"]
+        assert completions.calls == 2
+        assert coordinator.get_stats()["deduplicated"] == 1
+        assert coordinator.inflight == {}
+
+    asyncio.run(scenario())
+
+def test_calls_are_sent_without_waiting_for_a_window():
+    async def scenario():
+        coordinator, completions = _coordinator(delay=10)
+        task = asyncio.create_task(_complete(coordinator, "a"))
+        await asyncio.sleep(0.01)
+        assert completions.calls == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+def test_cancelling_the_only_waiter_aborts_the_request():
+    async def scenario():
+        coordinator, completions = _coordinator(delay=10)
+        task = asyncio.create_task(_complete(coordinator, "a"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        assert completions.cancelled == 1
+        assert coordinator.get_stats()["in_flight"] == 0
+        assert coordinator.get_stats()["aborted"] == 1
+        assert coordinator.inflight == {}
+
+    asyncio.run(scenario())
+
+def test_request_survives_while_another_waiter_remains():
+    async def scenario():
+        coordinator, completions = _coordinator(delay=0.05)
+        first = asyncio.create_task(_complete(coordinator, "a"))
+        second = asyncio.create_task(_complete(coordinator, "a"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "reply to a"
+        assert completions.calls == 1
+        assert completions.cancelled == 0
+
+    asyncio.run(scenario())
+
+def test_timeout_aborts_the_request():
+    async def scenario():
+        coordinator, completions = _coordinator(delay=10, timeout=0.05)
+        try:
+            await _complete(coordinator, "a")
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("expected a timeout")
+        assert completions.cancelled == 1
+        assert coordinator.get_stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+def test_concurrency_limit_is_respected():
+    async def scenario():
+        coordinator, completions = _coordinator(delay=0.05, max_concurrency=2)
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            for _ in range(20):
+                peak = max(peak, coordinator.get_stats()["in_flight"])
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(watch(), *(_complete(coordinator, str(i)) for i in range(5)))
+        assert peak == 2
+        assert completions.calls == 5
+
+    asyncio.run(scenario())
@@ -0,0 +1,26 @@
+from agents.prompt_compaction import compact_tool_output, estimate_tokens
+
+def _search_output(count):
+    lines = [f"Found {count} tickets matching 'network':", ""]
+    for number in range(1, count + 1):
+        description = "Bandwidth increase requested for the branch office" if number in (5, 6, 28) else "Router drops packets after the nightly reboot window"
+        lines += [f"{number}. TCK-{number:04d} - Network - {description}.",
+                  "   Status: Open, Priority: High",
+                  "   Assigned to: Kristin", ""]
+    return "\n".join(lines)
+
+def test_records_are_kept_in_rank_order():
+    compacted = compact_tool_output(_search_output(30), 200)
+    kept = [int(line.split(".")[0]) for line in compacted.splitlines() if line[:1].isdigit()]
+    assert kept == list(range(1, len(kept) + 1))
+    assert estimate_tokens(compacted) <= 200
+
+def test_flagged_anomalies_outrank_plain_items():
+    report = "\n".join(["Category Anomalies (last 7 days vs baseline):"]
+                       + [f"- Group {i}: z +0.{i:02d}, 3.0/day vs 3.0/day" for i in range(40)]
+                       + ["- Email: z +3.20, 9.0/day vs 2.0/day (anomaly)"])
+    compacted = compact_tool_output(report, 60)
+    assert "- Email: z +3.20, 9.0/day vs 2.0/day (anomaly)" in compacted
+
+def test_short_output_is_unchanged():
+    assert compact_tool_output("Total tickets: 3", 600) == "Total tickets: 3"
@@ -0,0 +1,26 @@
+import asyncio
+
+from ui.result_cache import QueryResultCache
+
+def _answer(**result):
+    return {"status": "success", "response_text": "answer", "query": "network trends", **result}
+
+def test_only_clean_analytics_agent_answers_are_cached():
+    async def scenario():
+        cache = QueryResultCache(ttl=60)
+        answers = {
+            "hedge": _answer(approach="mcp_trend_analysis", plain_render=True),
+            "search": _answer(approach="mcp_search"),
+            "direct": _answer(approach="ai_direct"),
+            "agent error": _answer(approach="analytics_agent", result={"error": "LLM unavailable"}),
+            "agent": _answer(approach="analytics_agent", result={"summary": "done"}),
+        }
+        for query, answer in answers.items():
+            async def compute(answer=answer):
+                return answer
+            await cache.get_or_compute(query, compute)
+
+        assert [query for query in answers if cache.get(query)] == ["agent"]
+        assert cache.get("agent")["cached"] is True
+
+    asyncio.run(scenario())
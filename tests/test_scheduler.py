@@ -0,0 +1,69 @@
+import asyncio
+
+from a2a_protocol.real_a2a_server import A2AServer
+from a2a_protocol.scheduler import PRIORITY_CLASSES, PriorityScheduler, parse_priority
+from fakes import RecordingSocket
+
+def test_higher_class_is_served_first():
+    scheduler = PriorityScheduler(aging_interval=0)
+    scheduler.push("batch", PRIORITY_CLASSES["batch"], 1.0)
+    scheduler.push("interactive", PRIORITY_CLASSES["interactive"], 2.0)
+    scheduler.push("normal", PRIORITY_CLASSES["normal"], 1.5)
+    assert [scheduler.pop(3.0) for _ in range(3)] == ["interactive", "normal", "batch"]
+    assert scheduler.pop(3.0) is None
+
+def test_aging_lets_old_batch_work_through():
+    scheduler = PriorityScheduler(aging_interval=5.0)
+    scheduler.push("old batch", PRIORITY_CLASSES["batch"], 0.0)
+    scheduler.push("new interactive", PRIORITY_CLASSES["interactive"], 11.0)
+    assert scheduler.pop(12.0) == "old batch"
+
+def test_promote_moves_the_entry_in_age_order():
+    scheduler = PriorityScheduler(aging_interval=0)
+    scheduler.push("older", 0, 1.0)
+    scheduler.push("newer", 0, 3.0)
+    scheduler.push("promoted", 2, 2.0)
+    assert scheduler.promote("promoted", 2, 0)
+    assert len(scheduler) == 3
+    assert [scheduler.pop(4.0) for _ in range(3)] == ["older", "promoted", "newer"]
+
+def test_parse_priority():
+    assert parse_priority("interactive") == 0
+    assert parse_priority(None, "batch") == 2
+    assert parse_priority("7") == 2
+    assert parse_priority("unknown") == 1
+
+def test_coalesced_promotion_does_not_inflate_agent_load():
+    async def scenario():
+        server = A2AServer(lease_ttl=60)
+        agent = RecordingSocket("agent")
+        await server.register_agent({"agent_id": "agent", "capabilities": ["trend_analysis"]}, agent)
+        task = {"from_agent": "ui", "to_agent": "agent", "task_type": "analyze_trends"}
+        await server.delegate_task(dict(task, payload={"query": "running"}))
+        await server.delegate_task(dict(task, payload={"query": "queued"}, priority="batch"))
+        before = server._agent_load("agent")
+        coalesced = await server.delegate_task(dict(task, from_agent="other", payload={"query": "queued"}, priority="interactive"))
+        assert coalesced["coalesced"]
+        assert server._agent_load("agent") == before == 2
+        assert len(server.queues["agent"]) == 1
+
+    asyncio.run(scenario())
+
+def test_cancelled_and_expired_queued_tasks_leave_the_agent_load():
+    async def scenario():
+        server = A2AServer(lease_ttl=60)
+        agent = RecordingSocket("agent")
+        await server.register_agent({"agent_id": "agent", "capabilities": ["trend_analysis"]}, agent)
+        task = {"from_agent": "ui", "to_agent": "agent", "task_type": "analyze_trends"}
+        await server.delegate_task(dict(task, payload={"query": "running"}))
+        cancelled = await server.delegate_task(dict(task, payload={"query": "cancelled"}))
+        expired = await server.delegate_task(dict(task, payload={"query": "expired"}, timeout=60))
+        assert server._agent_load("agent") == 3
+
+        await server.cancel_task({"task_id": cancelled["task_id"], "from_agent": "ui"}, None)
+        await server.expire_task(expired["task_id"])
+
+        assert server._agent_load("agent") == 1
+        assert len(server.queues["agent"]) == 0
+
+    asyncio.run(scenario())
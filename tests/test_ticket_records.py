@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import mcp_server.real_mcp_server as real_mcp_server
+from agents.real_analytics_agent import BulletproofAnalyticsAgent
+from agents.stats_engine import STATS_COLUMNS, is_statistical_query
+
+class ServerBackedMCPClient:
+    def __init__(self, server):
+        self.server = server
+        self.server_info = {"datasetVersion": server.dataset_version}
+        self.tools = dict(server.tools)
+        self.calls = []
+
+    async def call_tool(self, name, arguments, timeout=30.0):
+        self.calls.append(arguments)
+        result = await self.server.handle_tools_call(name, arguments)
+        assert len(json.dumps(result)) < 2**20
+        return {"result": result}
+
+def test_records_are_paged_and_projected(monkeypatch):
+    monkeypatch.setattr(real_mcp_server, "RECORDS_PAGE_SIZE", 300)
+    server = real_mcp_server.mcp_server
+
+    async def scenario():
+        first = (await server.handle_tools_call("get_ticket_records", {"columns": ["status"]}))["structuredContent"]
+        assert list(first["columns"]) == ["status"]
+        assert len(first["columns"]["status"]) == 300
+        assert first["next_offset"] == 300
+        last = (await server.handle_tools_call("get_ticket_records", {"columns": ["status"], "offset": 900}))["structuredContent"]
+        assert last["next_offset"] is None
+        assert len(last["columns"]["status"]) == len(server.df) - 900
+
+    asyncio.run(scenario())
+
+def test_stats_engine_loads_every_page(monkeypatch):
+    monkeypatch.setattr(real_mcp_server, "RECORDS_PAGE_SIZE", 300)
+    server = real_mcp_server.mcp_server
+    agent = BulletproofAnalyticsAgent()
+    agent.mcp_client = ServerBackedMCPClient(server)
+
+    async def scenario():
+        engine = await agent._get_stats_engine()
+        assert engine.size == len(server.df)
+        assert [call["offset"] for call in agent.mcp_client.calls] == [0, 300, 600, 900]
+        assert all(call["columns"] == STATS_COLUMNS for call in agent.mcp_client.calls)
+
+    asyncio.run(scenario())
+
+def test_workload_questions_are_statistical():
+    assert is_statistical_query("who is overloaded")
+    assert is_statistical_query("workload by assignee")
@@ -0,0 +1,48 @@
+import pytest
+
+from agents.real_analytics_agent import BulletproofAnalyticsAgent
+
+class FakeMCPClient:
+    tools = {"search_tickets": {}, "analyze_ticket_trends": {}, "get_ticket_summary": {}, "get_ticket_records": {}}
+
+@pytest.fixture
+def agent():
+    agent = BulletproofAnalyticsAgent()
+    agent.mcp_client = FakeMCPClient()
+    return agent
+
+def _plan(agent, query):
+    return [(step["tool"], step["arguments"].get("query")) for step in agent._plan_tool_calls(query)]
+
+@pytest.mark.parametrize("query, tool", [
+    ("analyze network and email trends", "analyze_ticket_trends"),
+    ("Show me tickets assigned to John and Sarah", "search_tickets"),
+    ("What are the trends in high and critical priority tickets?", "analyze_ticket_trends"),
+    ("backlog aging and workload by assignee", "stats_engine"),
+    ("network, email and hardware", "search_tickets")
+])
+def test_single_intent_queries_are_not_split(agent, query, tool):
+    assert _plan(agent, query) == [(tool, query)]
+
+def test_clauses_for_different_tools_are_split(agent):
+    assert _plan(agent, "Show open network tickets and analyze email trends") == [
+        ("search_tickets", "Show open network tickets"),
+        ("analyze_ticket_trends", "analyze email trends")
+    ]
+
+def test_no_clause_is_dropped(agent):
+    plan = _plan(agent, "list tickets assigned to John, Sarah; also week over week deltas")
+    assert plan == [
+        ("search_tickets", "list tickets assigned to John and Sarah"),
+        ("stats_engine", "week over week deltas")
+    ]
+
+def test_leading_clause_without_a_hint_joins_the_first_tool(agent):
+    assert _plan(agent, "email outages and the backlog, then show closed tickets") == [
+        ("stats_engine", "email outages and the backlog"),
+        ("search_tickets", "show closed tickets")
+    ]
+
+def test_missing_tools_fall_back_to_search(agent):
+    agent.mcp_client.tools = {"search_tickets": {}}
+    assert _plan(agent, "give me an overview") == [("search_tickets", "give me an overview")]
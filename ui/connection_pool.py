@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List
+
+def _is_open(websocket) -> bool:
+    return getattr(websocket, "close_code", None) is None
+
+class WebSocketPool:
+    def __init__(self, name: str, factory: Callable[[], Awaitable[Any]], max_size: int = 4):
+        self.name = name
+        self.factory = factory
+        self.max_size = max_size
+        self.idle: List[Any] = []
+        self.slots = asyncio.Semaphore(max_size)
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    async def acquire(self):
+        await self.slots.acquire()
+        while self.idle:
+            websocket = self.idle.pop()
+            if _is_open(websocket):
+                self.reused += 1
+                return websocket
+            self.discarded += 1
+        try:
+            websocket = await self.factory()
+        except BaseException:
+            self.slots.release()
+            raise
+        self.created += 1
+        return websocket
+
+    async def release(self, websocket, discard: bool = False):
+        try:
+            if discard or not _is_open(websocket):
+                self.discarded += 1
+                try:
+                    await websocket.close()
+                except:
+                    pass
+            else:
+                self.idle.append(websocket)
+        finally:
+            self.slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        websocket = await self.acquire()
+        try:
+            yield websocket
+        except BaseException:
+            await self.release(websocket, discard=True)
+            raise
+        await self.release(websocket)
+
+    async def warm(self, count: int = 1):
+        websockets = []
+        try:
+            for _ in range(min(count, self.max_size)):
+                websockets.append(await self.acquire())
+        finally:
+            for websocket in websockets:
+                await self.release(websocket)
+
+    async def close(self):
+        idle, self.idle = self.idle, []
+        for websocket in idle:
+            try:
+                await websocket.close()
+            except:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "idle": len(self.idle),
+            "max_size": self.max_size,
+            "created": self.created,
+            "reused": self.reused,
+            "discarded": self.discarded
+        }
+
+class BackgroundLoop:
+    def __init__(self, name: str = "ui-event-loop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: float = None):
+        return self.submit(coro).result(timeout)
@@ -5,7 +5,22 @@ import websockets
 from typing import Dict, Any
 import time
 import os
-from openai import OpenAI
+import sys
+import queue
+from functools import partial
+from openai import AsyncOpenAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.mcp_client import MCPClient
+from agents.prompt_compaction import DEFAULT_TOKEN_BUDGET, compact_tool_output
+from agents.stats_engine import is_statistical_query
+from a2a_protocol.tracing import Tracer, inject
+from ui.connection_pool import WebSocketPool, BackgroundLoop
+from ui.result_cache import QueryResultCache
+from ui.health_monitor import HealthMonitor
+
+A2A_SERVER_URL = "ws://localhost:9090"
+MCP_SERVER_URL = "ws://localhost:8080"
 
 st.set_page_config(
     page_title="IT Ticket AI System",
@@ -13,88 +28,137 @@ st.set_page_config(
     layout="wide"
 )
 
+async def open_a2a_connection(open_connection=websockets.connect):
+    return await open_connection(
+        A2A_SERVER_URL,
+        ping_interval=20,
+        ping_timeout=10,
+        close_timeout=5,
+        max_size=2**20,
+        open_timeout=5
+    )
+
+def _succeeded(task: asyncio.Task) -> bool:
+    if not task.done() or task.cancelled() or task.exception() is not None:
+        return False
+    result = task.result()
+    return "error" not in result and result.get("status") == "success"
+
+def _failure(task: asyncio.Task) -> str:
+    if not task.done() or task.cancelled():
+        return "Analytics Agent did not respond"
+    if task.exception() is not None:
+        return f"Analytics Agent error: {task.exception()}"
+    return task.result().get("error") or task.result().get("message") or "Analytics Agent failed"
+
 class AgentUIManager:
-    def __init__(self):
+    def __init__(self, a2a_pool: WebSocketPool = None, mcp_client: MCPClient = None, client: AsyncOpenAI = None,
+                 result_cache: QueryResultCache = None, health_monitor: HealthMonitor = None):
+        self.a2a_pool = a2a_pool
+        self.mcp_client = mcp_client or MCPClient(MCP_SERVER_URL, "Agent UI Manager")
+        self.owns_mcp_client = mcp_client is None
+        self.result_cache = result_cache
+        self.health_monitor = health_monitor
         self.a2a_websocket = None
-        self.mcp_websocket = None
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = client or AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.task_timeout = 15
+        self.hedge_delay = float(os.getenv("UI_HEDGE_DELAY", "1.5"))
+        self.latency_target = float(os.getenv("UI_LATENCY_TARGET", "6"))
+        self.progress_callback = None
+        self.pushed_messages = []
+        self.unanswered = 0
+        self.tracer = Tracer.from_env("ui")
     
-    async def cleanup_connections(self):
-        try:
-            if self.a2a_websocket:
-                await self.a2a_websocket.close()
-                self.a2a_websocket = None
-        except:
-            pass
+    def _notify(self, level: str, message: str):
+        if self.progress_callback:
+            self.progress_callback(level, message)
+    
+    async def _release(self, websocket, pool: WebSocketPool, discard: bool):
+        if pool:
+            await pool.release(websocket, discard=discard)
+        else:
+            try:
+                await websocket.close()
+            except:
+                pass
+    
+    async def cleanup_connections(self, discard: bool = False):
+        if self.a2a_websocket:
+            websocket, self.a2a_websocket = self.a2a_websocket, None
+            await self._release(websocket, self.a2a_pool, discard or self.unanswered > 0)
+        self.unanswered = 0
         
-        try:
-            if self.mcp_websocket:
-                await self.mcp_websocket.close()
-                self.mcp_websocket = None
-        except:
-            pass
+        if self.owns_mcp_client:
+            await self.mcp_client.close()
         
     async def connect_to_a2a(self):
         try:
             if self.a2a_websocket:
-                try:
-                    await self.a2a_websocket.close()
-                except:
-                    pass
-                self.a2a_websocket = None
-            
-            self.a2a_websocket = await websockets.connect(
-                "ws://localhost:9090",
-                ping_interval=20,
-                ping_timeout=10,
-                close_timeout=5,
-                max_size=2**20,
-                open_timeout=5
-            )
+                websocket, self.a2a_websocket = self.a2a_websocket, None
+                await self._release(websocket, self.a2a_pool, True)
+            self.unanswered = 0
+            
+            if self.a2a_pool:
+                self.a2a_websocket = await self.a2a_pool.acquire()
+            else:
+                self.a2a_websocket = await open_a2a_connection()
             return True
         except Exception as e:
-            st.error(f"Failed to connect to A2A server: {e}")
+            self._notify("error", f"Failed to connect to A2A server: {e}")
             self.a2a_websocket = None
             return False
     
     async def connect_to_mcp(self):
         try:
-            if self.mcp_websocket:
-                try:
-                    await self.mcp_websocket.close()
-                except:
-                    pass
-                self.mcp_websocket = None
-            
-            self.mcp_websocket = await websockets.connect(
-                "ws://localhost:8080",
-                ping_interval=20,
-                ping_timeout=10,
-                close_timeout=5,
-                max_size=2**20,
-                open_timeout=5
-            )
-            init_message = {
-                "jsonrpc": "2.0",
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {
-                        "name": "Agent UI Manager",
-                        "version": "1.0.0"
-                    }
-                },
-                "id": 1
-            }
-            await self.mcp_websocket.send(json.dumps(init_message))
-            response = await self.mcp_websocket.recv()
+            await self.mcp_client.ensure_connected(open_timeout=5)
+            if self.result_cache:
+                self.result_cache.set_dataset_version(self.mcp_client.server_info.get("datasetVersion"))
             return True
         except Exception as e:
-            st.error(f"Failed to connect to MCP server: {e}")
-            self.mcp_websocket = None
+            self._notify("error", f"Failed to connect to MCP server: {e}")
             return False
     
+    async def answer_query(self, query: str) -> Dict[str, Any]:
+        with self.tracer.span("ui.answer_query", query=query[:120]):
+            if self.result_cache is None:
+                return await self._answer_uncached(query)
+            return await self.result_cache.get_or_compute(query, lambda: self._answer_uncached(query))
+    
+    async def _answer_uncached(self, query: str) -> Dict[str, Any]:
+        discard = True
+        try:
+            result = await self.process_user_query(query)
+            result["response_text"] = await self._render_response(result, query)
+            discard = False
+            return result
+        finally:
+            await self.cleanup_connections(discard=discard)
+    
+    async def _render_response(self, result: Dict[str, Any], query: str):
+        with self.tracer.span("ui.render", approach=result.get("approach")):
+            return await self._render_result(result, query)
+    
+    async def _render_result(self, result: Dict[str, Any], query: str):
+        if "error" in result or result.get("status") != "success":
+            return None
+        approach = result.get("approach", "unknown")
+        if approach == "ai_direct":
+            return result.get("ai_response", "No AI response")
+        elif approach == "analytics_agent":
+            details = result.get("result", {}).get("details", {})
+            if details.get("response_style") == "conversational":
+                return details.get("enhanced_analysis")
+            return await self._convert_analytics_to_natural_language(result.get("result", {}), query)
+        elif approach in ["summary", "search", "mcp_trend_analysis", "mcp_search"]:
+            if result.get("plain_render"):
+                return self._tool_text(result.get("result", {}))
+            return await self._convert_to_natural_language(result.get("result", {}), query)
+        return None
+    
+    def _tool_text(self, result: Dict[str, Any]) -> str:
+        content = result.get("content") or [{}]
+        return compact_tool_output(content[0].get("text", "No response text"))
+    
     async def discover_agents(self):
         if not self.a2a_websocket:
             if not await self.connect_to_a2a():
@@ -104,19 +168,22 @@ class AgentUIManager:
             discovery_message = {
                 "type": "discover_agents"
             }
-            await self.a2a_websocket.send(json.dumps(discovery_message))
-            response = await self.a2a_websocket.recv()
-            result = json.loads(response)
+            await self._send_request(discovery_message)
+            result = await self._recv_response()
             
             if result.get("status") == "success":
                 return result.get("agents", [])
             else:
                 return []
         except Exception as e:
-            st.error(f"Error discovering agents: {e}")
+            self._notify("error", f"Error discovering agents: {e}")
             return []
     
-    async def delegate_to_analytics_agent(self, query: str) -> Dict[str, Any]:
+    async def delegate_to_analytics_agent(self, query: str, fallback: bool = True) -> Dict[str, Any]:
+        with self.tracer.span("ui.delegate_analytics", hedged=not fallback):
+            return await self._delegate_to_analytics_agent(query, fallback)
+    
+    async def _delegate_to_analytics_agent(self, query: str, fallback: bool) -> Dict[str, Any]:
         if not self.a2a_websocket:
             if not await self.connect_to_a2a():
                 return {"error": "Could not connect to A2A server"}
@@ -131,44 +198,89 @@ class AgentUIManager:
                     break
             
             if not analytics_agent:
-                st.warning("Analytics Agent not available, using MCP trend analysis...")
-                return await self._fallback_trend_analysis(query)
+                return await self._analytics_unavailable(query, "Analytics Agent not available", fallback)
             
             task_message = {
                 "type": "delegate_task",
                 "from_agent": "ui_manager",
                 "to_agent": "analytics_agent",
                 "task_type": "analyze_trends",
+                "priority": "interactive",
+                "timeout": self.task_timeout,
+                "stream": True,
                 "payload": {
-                    "query": query
+                    "query": query,
+                    "response_style": "conversational"
                 }
             }
             
-            await self.a2a_websocket.send(json.dumps(task_message))
+            await self._send_request(inject(task_message))
             
             try:
-                response = await asyncio.wait_for(self.a2a_websocket.recv(), timeout=3.0)
-                result = json.loads(response)
+                result = await asyncio.wait_for(self._recv_response(), timeout=3.0)
                 
                 if result.get("status") == "success":
                     task_id = result.get("task_id")
-                    completion_result = await self._wait_for_task_completion(task_id)
+                    try:
+                        completion_result = await self._wait_for_task_completion(task_id)
+                    except asyncio.CancelledError:
+                        await self._cancel_task(task_id, "superseded by hedged result")
+                        raise
                     
                     if "error" in completion_result:
-                        st.warning(f"Analytics Agent task failed: {completion_result['error']}. Using fallback...")
-                        return await self._fallback_trend_analysis(query)
+                        return await self._analytics_unavailable(query, f"Analytics Agent task failed: {completion_result['error']}", fallback)
                     
                     return completion_result
                 else:
-                    st.warning(f"Task delegation failed: {result.get('message')}. Using fallback...")
-                    return await self._fallback_trend_analysis(query)
+                    return await self._analytics_unavailable(query, f"Task delegation failed: {result.get('message')}", fallback)
             except asyncio.TimeoutError:
-                st.warning("Analytics Agent response timeout. Using fallback...")
-                return await self._fallback_trend_analysis(query)
+                return await self._analytics_unavailable(query, "Analytics Agent response timeout", fallback)
                 
         except Exception as e:
-            st.warning(f"Analytics Agent error: {e}. Using fallback...")
-            return await self._fallback_trend_analysis(query)
+            return await self._analytics_unavailable(query, f"Analytics Agent error: {e}", fallback)
+    
+    async def _analytics_unavailable(self, query: str, reason: str, fallback: bool) -> Dict[str, Any]:
+        if not fallback:
+            return {"error": reason}
+        self._notify("warning", f"{reason}. Using MCP trend analysis...")
+        return await self._fallback_trend_analysis(query)
+    
+    async def _hedged_analytics(self, query: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        primary = asyncio.create_task(self.delegate_to_analytics_agent(query, fallback=False))
+        hedge = None
+        try:
+            await asyncio.wait({primary}, timeout=self.hedge_delay)
+            if _succeeded(primary):
+                return primary.result()
+            
+            hedge = asyncio.create_task(self._fallback_trend_analysis(query))
+            if primary.done():
+                self._notify("warning", f"{_failure(primary)}. Using MCP trend analysis...")
+                return await hedge
+            
+            remaining = self.latency_target - (loop.time() - started)
+            if remaining > 0:
+                await asyncio.wait({primary}, timeout=remaining)
+                if _succeeded(primary):
+                    return primary.result()
+            
+            pending = {task for task in (primary, hedge) if not task.done() or _succeeded(task)}
+            while pending:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if _succeeded(primary):
+                    return primary.result()
+                if _succeeded(hedge):
+                    self._notify("warning", f"Analytics Agent missed the {self.latency_target:g}s target, showing MCP trend analysis")
+                    return dict(hedge.result(), plain_render=True)
+            return {"error": _failure(primary)}
+        finally:
+            losers = [task for task in (primary, hedge) if task is not None and not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
     
     async def _fallback_trend_analysis(self, query: str) -> Dict[str, Any]:
         try:
@@ -194,23 +306,61 @@ class AgentUIManager:
         except Exception as e:
             return await self._ai_direct_response(query)
     
+    async def _send_request(self, message: Dict[str, Any]):
+        self.unanswered += 1
+        await self.a2a_websocket.send(json.dumps(message))
+    
+    async def _recv_response(self) -> Dict[str, Any]:
+        while True:
+            data = json.loads(await self.a2a_websocket.recv())
+            if data.get("type") in ("task_progress", "task_completed", "task_failed"):
+                self.pushed_messages.append(data)
+                continue
+            self.unanswered -= 1
+            return data
+    
     async def _wait_for_task_completion(self, task_id: str) -> Dict[str, Any]:
         try:
             
-            timeout = 15
-            poll_interval = 0.5
+            timeout = self.task_timeout
+            poll_interval = 2.0
             
             start_time = time.time()
             while time.time() - start_time < timeout:
                 try:
-                    status_message = {
-                        "type": "task_status",
-                        "task_id": task_id
-                    }
-                    await self.a2a_websocket.send(json.dumps(status_message))
+                    if self.pushed_messages:
+                        data = self.pushed_messages.pop(0)
+                    else:
+                        try:
+                            remaining = timeout - (time.time() - start_time)
+                            response = await asyncio.wait_for(self.a2a_websocket.recv(), timeout=max(0.1, min(poll_interval, remaining)))
+                        except asyncio.TimeoutError:
+                            status_message = {
+                                "type": "task_status",
+                                "task_id": task_id
+                            }
+                            await self._send_request(status_message)
+                            continue
+                        data = json.loads(response)
+                        if data.get("type") not in ("task_progress", "task_completed", "task_failed"):
+                            self.unanswered -= 1
                     
-                    response = await asyncio.wait_for(self.a2a_websocket.recv(), timeout=2.0)
-                    data = json.loads(response)
+                    message_type = data.get("type")
+                    if message_type in ("task_progress", "task_completed", "task_failed") and data.get("task_id") != task_id:
+                        continue
+                    
+                    if message_type == "task_progress":
+                        if self.progress_callback:
+                            self.progress_callback(data.get("stage"), data.get("content", ""))
+                        continue
+                    elif message_type == "task_completed":
+                        return {
+                            "status": "success",
+                            "result": data.get("result", {}),
+                            "approach": "analytics_agent"
+                        }
+                    elif message_type == "task_failed":
+                        return {"error": data.get("error") or "Task execution failed"}
                     
                     if data.get("status") == "success" and "task" in data:
                         task = data["task"]
@@ -222,39 +372,39 @@ class AgentUIManager:
                                 "result": task.get("result", {}),
                                 "approach": "analytics_agent"
                             }
-                        elif task_status == "failed":
-                            return {"error": "Task execution failed"}
-                    
-                    await asyncio.sleep(poll_interval)
+                        elif task_status in ("failed", "cancelled"):
+                            return {"error": task.get("error") or "Task execution failed"}
                         
-                except asyncio.TimeoutError:
-                    continue
                 except (websockets.exceptions.ConnectionClosed, websockets.exceptions.InvalidMessage, EOFError):
                     return {"error": "Connection lost while waiting for task completion"}
                     
+            await self._cancel_task(task_id, "caller timed out")
             return {"error": f"Task {task_id} timed out after {timeout} seconds"}
                     
         except Exception as e:
             return {"error": f"Error waiting for task completion: {e}"}
     
+    async def _cancel_task(self, task_id: str, reason: str):
+        try:
+            cancel_message = {
+                "type": "cancel_task",
+                "task_id": task_id,
+                "from_agent": "ui_manager",
+                "reason": reason
+            }
+            await self._send_request(inject(cancel_message))
+            await asyncio.wait_for(self._recv_response(), timeout=2.0)
+        except Exception:
+            pass
+    
     async def execute_mcp_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        if not self.mcp_websocket:
+        if not self.mcp_client.connected:
             if not await self.connect_to_mcp():
                 return {"error": "Not connected to MCP server"}
         
         try:
-            tool_call = {
-                "jsonrpc": "2.0",
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                },
-                "id": 2
-            }
-            await self.mcp_websocket.send(json.dumps(tool_call))
-            response = await self.mcp_websocket.recv()
-            result = json.loads(response)
+            with self.tracer.span("ui.mcp_tool", tool=tool_name):
+                result = await self.mcp_client.call_tool(tool_name, arguments)
             
             if "result" in result:
                 return result["result"]
@@ -264,30 +414,30 @@ class AgentUIManager:
         except Exception as e:
             return {"error": f"Tool execution failed: {str(e)}"}
     
+    async def _chat(self, **params):
+        with self.tracer.span("ui.llm", model=params.get("model")):
+            return await self.client.chat.completions.create(**params)
+    
     async def process_user_query(self, query: str) -> Dict[str, Any]:
         query_lower = query.lower()
         
-        if any(word in query_lower for word in ["trend", "analysis", "analyze", "pattern", "insight", "report"]):
-            result = await self.delegate_to_analytics_agent(query)
+        if is_statistical_query(query) or any(word in query_lower for word in ["trend", "analysis", "analyze", "pattern", "insight", "report"]):
+            result = await self._hedged_analytics(query)
             if "error" not in result:
                 return result
         
+        candidates = []
         if any(word in query_lower for word in ["summary", "overview", "statistics", "total"]):
-            result = await self.execute_mcp_tool("get_ticket_summary", {})
-            if "error" not in result:
-                return {
-                    "status": "success",
-                    "approach": "summary",
-                    "result": result,
-                    "query": query
-                }
-        
+            candidates.append(("summary", "get_ticket_summary", {}))
         if any(word in query_lower for word in ["search", "find", "show", "list", "tickets"]):
-            result = await self.execute_mcp_tool("search_tickets", {"query": query})
+            candidates.append(("search", "search_tickets", {"query": query}))
+        
+        results = await asyncio.gather(*(self.execute_mcp_tool(tool, arguments) for _, tool, arguments in candidates))
+        for (approach, _, _), result in zip(candidates, results):
             if "error" not in result:
                 return {
                     "status": "success",
-                    "approach": "search",
+                    "approach": approach,
                     "result": result,
                     "query": query
                 }
@@ -315,7 +465,7 @@ class AgentUIManager:
             Format your response as a natural conversation, not as technical data.
             """
             
-            response = self.client.chat.completions.create(
+            response = await self._chat(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a friendly IT support analyst. Provide helpful, conversational responses about IT ticket management in natural human language. Be warm, professional, and easy to understand."},
@@ -346,8 +496,8 @@ class AgentUIManager:
             summary = analytics_result.get("summary", "")
             details = analytics_result.get("details", {})
             
-            raw_analysis = details.get("raw_analysis", "")
-            enhanced_analysis = details.get("enhanced_analysis", "")
+            raw_analysis = compact_tool_output(details.get("raw_analysis", ""), DEFAULT_TOKEN_BUDGET * 2 // 3)
+            enhanced_analysis = compact_tool_output(details.get("enhanced_analysis", ""), DEFAULT_TOKEN_BUDGET * 5 // 6)
             tool_used = details.get("tool_used", "unknown")
             
             context = f"""
@@ -380,7 +530,7 @@ class AgentUIManager:
             Focus on the real data and insights provided, not generic responses.
             """
             
-            response = self.client.chat.completions.create(
+            response = await self._chat(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a friendly IT support analyst who excels at explaining data insights in clear, conversational language. You help people understand trends and make data-driven decisions."},
@@ -414,7 +564,7 @@ class AgentUIManager:
         try:
             if "content" in result:
                 content = result.get("content", [{}])[0]
-                text = content.get("text", "No response text")
+                text = compact_tool_output(content.get("text", "No response text"))
                 
                 conversion_prompt = f"""
                 Convert this technical IT ticket system response into natural, conversational language:
@@ -426,7 +576,7 @@ class AgentUIManager:
                 Be conversational, helpful, and easy to understand.
                 """
                 
-                response = self.client.chat.completions.create(
+                response = await self._chat(
                     model="gpt-4o-mini",
                     messages=[
                         {"role": "system", "content": "You are a friendly IT support analyst. Convert technical data into natural, conversational explanations."},
@@ -444,45 +594,82 @@ class AgentUIManager:
             return f"I found some data, but I'm having trouble converting it to a clear explanation. Here's what I found: {str(e)}"
     
     async def check_system_status(self) -> Dict[str, Any]:
-        status = {
-            "mcp_server": False,
-            "a2a_server": False,
-            "analytics_agent": False
-        }
-        
-        try:
-            async with websockets.connect("ws://localhost:8080") as ws:
-                status["mcp_server"] = True
-        except:
-            pass
-        
+        if self.health_monitor is None:
+            self.health_monitor = HealthMonitor(open_a2a_connection, self.mcp_client)
+        return await self.health_monitor.check()
+
+class UIRuntime:
+    def __init__(self):
+        self.loop = BackgroundLoop()
+        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.result_cache = QueryResultCache(
+            ttl=float(os.getenv("UI_RESULT_CACHE_TTL", "300")),
+            max_entries=int(os.getenv("UI_RESULT_CACHE_ENTRIES", "256"))
+        )
+        self.embedded_stack = None
+        self.open_connection = websockets.connect
+        if os.getenv("EMBEDDED_MODE", "0") == "1":
+            self.embedded_stack = self.loop.run(self._start_embedded_stack())
+        self.a2a_pool, self.mcp_client = self.loop.run(self._create_connections())
+        self.health_monitor = HealthMonitor(
+            partial(open_a2a_connection, self.open_connection),
+            self.mcp_client,
+            ttl=float(os.getenv("UI_HEALTH_TTL", "5")),
+            timeout=float(os.getenv("UI_HEALTH_TIMEOUT", "1"))
+        )
+    
+    async def _start_embedded_stack(self):
+        from agents.embedded_stack import EmbeddedStack
+
+        stack = EmbeddedStack(A2A_SERVER_URL, MCP_SERVER_URL)
+        await stack.start()
+        return stack
+    
+    async def _create_connections(self):
+        if self.embedded_stack:
+            self.open_connection = self.embedded_stack.connect
+        a2a_pool = WebSocketPool("a2a", partial(open_a2a_connection, self.open_connection), int(os.getenv("UI_POOL_SIZE", "4")))
+        mcp_client = MCPClient(MCP_SERVER_URL, "Agent UI Manager", open_connection=self.open_connection)
         try:
-            async with websockets.connect("ws://localhost:9090") as ws:
-                status["a2a_server"] = True
-        except:
+            await a2a_pool.warm(1)
+        except Exception:
             pass
-        
         try:
-            if self.a2a_websocket:
-                agents = await self.discover_agents()
-                for agent in agents:
-                    if agent.get("agent_id") == "analytics_agent":
-                        status["analytics_agent"] = True
-                        break
-        except:
+            await mcp_client.ensure_connected(open_timeout=5)
+            self.result_cache.set_dataset_version(mcp_client.server_info.get("datasetVersion"))
+        except Exception:
             pass
-        
-        return status
+        return a2a_pool, mcp_client
+    
+    def new_manager(self) -> AgentUIManager:
+        return AgentUIManager(self.a2a_pool, self.mcp_client, self.client, self.result_cache, self.health_monitor)
+
+@st.cache_resource
+def get_ui_runtime() -> UIRuntime:
+    return UIRuntime()
 
 def main():
     st.title("🤖 AI Ticket Assistant")
     st.markdown("Ask me anything about your IT tickets")
     
-    ui_manager = AgentUIManager()
+    runtime = get_ui_runtime()
+    ui_manager = runtime.new_manager()
     
     if 'query_history' not in st.session_state:
         st.session_state.query_history = []
     
+    with st.sidebar:
+        st.subheader("System Status")
+        try:
+            status = runtime.loop.run(ui_manager.check_system_status(), timeout=3)
+            for component, label in [("a2a_server", "A2A Server"), ("mcp_server", "MCP Server"), ("analytics_agent", "Analytics Agent")]:
+                probe = status[component]
+                icon = {"up": "🟢", "timeout": "🟡", "unknown": "⚪"}.get(probe["status"], "🔴")
+                latency = f" ({probe['latency_ms']} ms)" if "latency_ms" in probe else ""
+                st.write(f"{icon} {label}: {probe['status']}{latency}")
+        except Exception as e:
+            st.write(f"⚪ Status unavailable: {e}")
+    
     query = st.text_input(
         "What would you like to know about your tickets?",
         placeholder="e.g., 'Show me network issues' or 'Analyze trends in high priority tickets'",
@@ -491,12 +678,40 @@ def main():
     
     if st.button("Ask AI", type="primary"):
         if query:
+            progress_area = st.empty()
+            streamed = {"raw": "", "llm": ""}
+            
+            def render_progress(stage, content):
+                if stage == "warning":
+                    st.warning(content)
+                    return
+                if stage == "error":
+                    st.error(content)
+                    return
+                if stage == "raw":
+                    streamed["raw"] = content
+                else:
+                    streamed["llm"] += content
+                with progress_area.container():
+                    st.caption("📡 Live results from the Analytics Agent")
+                    if streamed["llm"]:
+                        st.markdown(streamed["llm"])
+                    if streamed["raw"]:
+                        st.text(streamed["raw"])
+            
+            events = queue.Queue()
+            ui_manager.progress_callback = lambda stage, content: events.put((stage, content))
+            
             with st.spinner("Thinking..."):
-                loop = None
                 try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    result = loop.run_until_complete(ui_manager.process_user_query(query))
+                    future = runtime.loop.submit(ui_manager.answer_query(query))
+                    while not future.done() or not events.empty():
+                        try:
+                            render_progress(*events.get(timeout=0.05))
+                        except queue.Empty:
+                            continue
+                    result = future.result()
+                    progress_area.empty()
                     
                     st.session_state.query_history.append({
                         "query": query,
@@ -506,38 +721,17 @@ def main():
                     
                     if "error" in result:
                         st.error(f"Error: {result['error']}")
-                    else:
-                        if result.get("status") == "success":
-                            approach = result.get("approach", "unknown")
-                            
-                            if approach == "ai_direct":
-                                ai_response = result.get("ai_response", "No AI response")
-                                st.write(ai_response)
-                            elif approach == "analytics_agent":
-                                analytics_result = result.get("result", {})
-                                
-                                natural_response = loop.run_until_complete(
-                                    ui_manager._convert_analytics_to_natural_language(analytics_result, query)
-                                )
-                                st.write(natural_response)
-                            elif approach in ["summary", "search", "mcp_trend_analysis", "mcp_search"]:
-                                mcp_result = result.get("result", {})
-                                
-                                natural_response = loop.run_until_complete(ui_manager._convert_to_natural_language(mcp_result, query))
-                                st.write(natural_response)
-                            else:
-                                st.json(result)
+                    elif result.get("status") == "success":
+                        if result.get("cached"):
+                            st.caption(f"⚡ Cached result ({result.get('cached_age', 0)}s old)")
+                        if result.get("response_text") is not None:
+                            st.write(result["response_text"])
                         else:
-                            st.error(f"Error: {result.get('message', 'Unknown error')}")
+                            st.json(result)
+                    else:
+                        st.error(f"Error: {result.get('message', 'Unknown error')}")
                 except Exception as e:
                     st.error(f"Error processing query: {e}")
-                finally:
-                    try:
-                        if loop:
-                            loop.run_until_complete(ui_manager.cleanup_connections())
-                            loop.close()
-                    except:
-                        pass
         else:
             st.warning("Please enter a question")
     
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from agents.mcp_client import MCPClient
+
+class HealthMonitor:
+    def __init__(self, open_a2a: Callable[[], Awaitable[Any]], mcp_client: MCPClient, ttl: float = 5.0, timeout: float = 1.0):
+        self.open_a2a = open_a2a
+        self.a2a_websocket = None
+        self.mcp_client = mcp_client
+        self.ttl = ttl
+        self.timeout = timeout
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.refreshing: Optional[asyncio.Task] = None
+
+    async def check(self) -> Dict[str, Any]:
+        if self.snapshot and time.time() - self.snapshot["checked_at"] < self.ttl:
+            return self.snapshot
+        if self.refreshing is None or self.refreshing.done():
+            self.refreshing = asyncio.create_task(self._refresh())
+        if self.snapshot:
+            return self.snapshot
+        return await asyncio.shield(self.refreshing)
+
+    async def _refresh(self) -> Dict[str, Any]:
+        mcp, (a2a, agents) = await asyncio.gather(self._probe_mcp(), self._probe_a2a())
+        if a2a["status"] != "up":
+            analytics = {"status": "unknown"}
+        elif any(agent.get("agent_id") == "analytics_agent" for agent in agents):
+            analytics = {"status": "up"}
+        else:
+            analytics = {"status": "down"}
+        self.snapshot = {
+            "mcp_server": mcp,
+            "a2a_server": a2a,
+            "analytics_agent": analytics,
+            "checked_at": time.time()
+        }
+        return self.snapshot
+
+    async def _probe_mcp(self) -> Dict[str, Any]:
+        async def ping():
+            await self.mcp_client.ensure_connected(open_timeout=self.timeout)
+            await self.mcp_client.request("ping", timeout=self.timeout)
+
+        status, _ = await self._probe(ping)
+        return status
+
+    async def _probe_a2a(self):
+        async def discover():
+            if self.a2a_websocket is None or self.a2a_websocket.close_code is not None:
+                self.a2a_websocket = await self.open_a2a()
+            await self.a2a_websocket.send(json.dumps({"type": "discover_agents"}))
+            while True:
+                data = json.loads(await self.a2a_websocket.recv())
+                if "agents" in data:
+                    return data["agents"]
+
+        status, agents = await self._probe(discover)
+        if status["status"] != "up":
+            await self._drop_a2a()
+        return status, agents or []
+
+    async def _drop_a2a(self):
+        websocket, self.a2a_websocket = self.a2a_websocket, None
+        if websocket:
+            try:
+                await websocket.close()
+            except:
+                pass
+
+    async def _probe(self, exchange):
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(exchange(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return {"status": "timeout", "latency_ms": round(self.timeout * 1000)}, None
+        except Exception as e:
+            return {"status": "down", "error": str(e)}, None
+        return {"status": "up", "latency_ms": round((time.perf_counter() - started) * 1000, 1)}, result
@@ -0,0 +1,93 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+def normalize_query(query: str) -> str:
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+def _cacheable(result: Dict[str, Any]) -> bool:
+    if "error" in result or result.get("status") != "success" or result.get("response_text") is None:
+        return False
+    if result.get("approach") != "analytics_agent" or result.get("plain_render"):
+        return False
+    return "error" not in (result.get("result") or {})
+
+class QueryResultCache:
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, Optional[str]], Dict[str, Any]]" = OrderedDict()
+        self.inflight: Dict[Tuple[str, Optional[str]], asyncio.Future] = {}
+        self.dataset_version = None
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def set_dataset_version(self, version: Optional[str]):
+        if version != self.dataset_version:
+            self.dataset_version = version
+            self.entries.clear()
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        key = (normalize_query(query), self.dataset_version)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry["stored_at"]
+        if age > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return {**entry["result"], "cached": True, "cached_age": round(age, 1)}
+
+    def put(self, query: str, result: Dict[str, Any], dataset_version: Optional[str] = None):
+        key = (normalize_query(query), dataset_version if dataset_version is not None else self.dataset_version)
+        self.entries[key] = {"result": result, "stored_at": time.monotonic()}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def get_or_compute(self, query: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        cached = self.get(query)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        dataset_version = self.dataset_version
+        key = (normalize_query(query), dataset_version)
+        shared = self.inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            return {**await asyncio.shield(shared), "cached": True, "cached_age": 0.0}
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.inflight[key] = future
+        try:
+            result = await compute()
+            if _cacheable(result):
+                self.put(query, result, dataset_version)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "dataset_version": self.dataset_version
+        }